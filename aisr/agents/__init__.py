@@ -1,6 +1,6 @@
 """智能体组件"""
 
-from aisr.agents.base import Agent
+from aisr.agents.base import Agent, AsyncAgent
 from aisr.agents.task_plan import TaskPlanAgent
 from aisr.agents.search_plan import SearchPlanAgent
 from aisr.agents.sub_answer import SubAnswerAgent
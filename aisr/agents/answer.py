@@ -4,16 +4,15 @@
 作为研究过程的最后一步，负责将所有收集的信息整合为连贯、全面的最终答案。
 """
 
-import logging
-from datetime import datetime
+from datetime import date
 from typing import Dict, Any, List
-import json
 
-from aisr.agents.base import Agent
-from aisr.utils import logging_utils
+from aisr.agents.base import AsyncAgent, render_sub_answers
+from aisr.core.llm_provider import ChatMessage
+from aisr.utils import json_utils, logging_utils
 logger = logging_utils.get_logger(__name__, color="green")
 
-class AnswerAgent(Agent):
+class AnswerAgent(AsyncAgent):
     """
     答案生成代理，综合所有子答案，生成最终答案。
 
@@ -26,7 +25,50 @@ class AnswerAgent(Agent):
     - 最终综合答案
     """
 
-    def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
+    # 函数调用模式在类加载时定义一次，避免每次调用重新分配dict字面量
+    FUNCTIONS = [{
+        "name": "generate_final_answer",
+        "description": "综合所有子答案，生成最终答案",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "answer": {
+                    "type": "string",
+                    "description": "最终综合答案"
+                }
+            },
+            "required": ["answer"]
+        }
+    }]
+
+    # LLM未返回预期函数调用时的降级返回值
+    ERROR_PAYLOAD = {
+        "error": "生成最终答案失败",
+        "answer": "无法基于提供的信息生成综合答案。"
+    }
+
+    # 系统提示为全静态文本，类加载时定义一次，每次调用直接复用
+    SYSTEM_PROMPT = """你是一位资深研究撰写专家，擅长整合多源信息，生成全面、连贯的研究报告。
+
+你的职责是：
+1. 分析原始研究问题
+2. 综合所有子任务的答案
+3. 按照提供的结构大纲(如果有)组织内容
+4. 生成一个连贯、全面的最终答案
+
+撰写原则：
+- 保持客观，以事实和证据为基础
+- 整合所有来源的信息，解决可能存在的矛盾
+- 确保最终答案直接回应原始查询
+- 重点突出最重要的发现和洞见
+- 结构清晰，逻辑连贯，行文流畅
+- 适当引用关键信息来源
+- 保持适当的详细程度，既全面又简洁
+- 使用和用户query相同的语言回答
+
+你的最终答案应该是一个完整、独立的文档，能够提供对原始查询的全面解答，无需读者查看中间过程或原始资料。"""
+
+    async def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """
         执行答案生成，综合所有信息为最终答案。
 
@@ -48,45 +90,51 @@ class AnswerAgent(Agent):
             raise ValueError("答案生成必须提供用户查询")
 
         if not sub_answers:
-            logging.warning("未提供任何子答案，将基于查询生成简单答案")
+            logger.warning("未提供任何子答案，将基于查询生成简单答案")
 
         if not outline:
-            logging.warning("未提供答案大纲，将自行组织答案结构")
+            logger.warning("未提供答案大纲，将自行组织答案结构")
+
+        # 构建提示并调用LLM生成最终答案
+        return await self._execute_function_call(
+            context, self.FUNCTIONS, "generate_final_answer", self.ERROR_PAYLOAD)
+
+    async def execute_streaming(self, context: Dict[str, Any]):
+        """
+        流式执行答案生成，逐块产出最终答案文本。
+
+        最终答案本质上是单个长文本字段，因此流式模式下直接使用
+        文本生成接口逐token产出，调用方可即时推送到UI或日志，
+        将可感知延迟降低到首token时间。
+
+        Args:
+            context: 与execute相同的输入上下文
+
+        Yields:
+            最终答案的文本片段
+        """
+        logger.info(f"===AnswerAgent(streaming)===")
+        query = context.get("query")
+        sub_answers = context.get("sub_answers", {})
+        outline = context.get("outline", "")
+
+        if not query:
+            raise ValueError("答案生成必须提供用户查询")
+
+        if not sub_answers:
+            logger.warning("未提供任何子答案，将基于查询生成简单答案")
+
+        if not outline:
+            logger.warning("未提供答案大纲，将自行组织答案结构")
 
         # 构建提示
-        prompt = self.build_prompt(context)
-
-        # 调用LLM生成最终答案
-        functions = [{
-            "name": "generate_final_answer",
-            "description": "综合所有子答案，生成最终答案",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "answer": {
-                        "type": "string",
-                        "description": "最终综合答案"
-                    }
-                },
-                "required": ["answer"]
-            }
-        }]
-
-        result = self.llm.generate_with_function_calling(prompt, functions)
-
-        if "name" not in result or result["name"] != "generate_final_answer":
-            # 处理LLM未返回预期函数调用的情况
-            logging.error("LLM未返回最终答案生成函数调用")
-            error_response = {
-                "error": "生成最终答案失败",
-                "answer": "无法基于提供的信息生成综合答案。"
-            }
-            return error_response
-
-        # 返回最终答案
-        return result["arguments"]
-
-    def build_prompt(self, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+        prompt = await self.build_prompt(context)
+
+        # 流式调用LLM，逐块产出答案
+        async for chunk in self.llm.generate_stream_async(prompt):
+            yield chunk
+
+    async def build_prompt(self, context: Dict[str, Any]) -> List[ChatMessage]:
         """
         构建LLM提示。
 
@@ -99,33 +147,34 @@ class AnswerAgent(Agent):
         messages = []
 
         # 系统提示
-        system_prompt = self._get_system_prompt()
-        messages.append({"role": "system", "content": system_prompt})
+        messages.append(ChatMessage("system", self._get_system_prompt()))
 
         # 构建用户提示
         query = context.get("query", "")
         sub_answers = context.get("sub_answers", {})
         outline = context.get("outline", "")
 
-        user_prompt = f"我需要基于以下信息，生成对原始查询的综合答案:\n\n"
-        user_prompt += f"## 原始查询\n{query}\n\n"
+        # 日期属于动态内容，放入用户消息以保持系统提示前缀稳定；
+        # date.today().isoformat()跳过时间字段且使用固定格式，比strftime更快
+        formatted_date = date.today().isoformat()
+        # 用列表收集片段，最后一次join，避免重复字符串拼接的二次开销
+        prompt_parts = [f"now date:{formatted_date}\n我需要基于以下信息，生成对原始查询的综合答案:\n\n"]
+        prompt_parts.append(f"## 原始查询\n{query}\n\n")
 
         # 添加答案大纲（如果有）
         if outline:
-            user_prompt += f"## 答案结构大纲\n{outline}\n\n"
+            prompt_parts.append(f"## 答案结构大纲\n{outline}\n\n")
 
         # 添加所有子答案
         if sub_answers:
-            user_prompt += "## 子任务答案\n\n"
-            for task_id, answer in sub_answers.items():
-                user_prompt += f"### 任务: {task_id}\n"
-                user_prompt += f"{str(answer)}\n\n"
+            prompt_parts.append("## 子任务答案\n\n")
+            prompt_parts.append(render_sub_answers(sub_answers))
 
-        user_prompt += "\n\n请基于上述信息，生成一个全面、连贯的最终答案，回应原始查询。"
+        prompt_parts.append("\n\n请基于上述信息，生成一个全面、连贯的最终答案，回应原始查询。")
         if outline:
-            user_prompt += " 请按照提供的大纲组织答案结构。"
+            prompt_parts.append(" 请按照提供的大纲组织答案结构。")
 
-        messages.append({"role": "user", "content": user_prompt})
+        messages.append(ChatMessage("user", "".join(prompt_parts)))
 
         return messages
 
@@ -136,26 +185,7 @@ class AnswerAgent(Agent):
         Returns:
             系统提示字符串
         """
-        formatted_date = datetime.now().strftime("%Y-%m-%d")
-        return f"""now date:{formatted_date}\n你是一位资深研究撰写专家，擅长整合多源信息，生成全面、连贯的研究报告。
-
-你的职责是：
-1. 分析原始研究问题
-2. 综合所有子任务的答案
-3. 按照提供的结构大纲(如果有)组织内容
-4. 生成一个连贯、全面的最终答案
-
-撰写原则：
-- 保持客观，以事实和证据为基础
-- 整合所有来源的信息，解决可能存在的矛盾
-- 确保最终答案直接回应原始查询
-- 重点突出最重要的发现和洞见
-- 结构清晰，逻辑连贯，行文流畅
-- 适当引用关键信息来源
-- 保持适当的详细程度，既全面又简洁
-- 使用和用户query相同的语言回答
-
-你的最终答案应该是一个完整、独立的文档，能够提供对原始查询的全面解答，无需读者查看中间过程或原始资料。"""
+        return self.SYSTEM_PROMPT
 
     def parse_response(self, response: str) -> Dict[str, Any]:
         """
@@ -170,10 +200,10 @@ class AnswerAgent(Agent):
         # 由于使用function calling，此方法在当前实现中不会被调用
         # 保留此方法以符合Agent抽象基类要求
         try:
-            parsed = json.loads(response)
+            parsed = json_utils.loads(response)
             return parsed
-        except:
-            logging.error(f"解析最终答案响应失败: {response}")
+        except (ValueError, TypeError) as e:
+            logger.error("解析最终答案响应失败: %s; 响应: %.200s", e, response)
             return {
                 "error": "解析响应失败",
                 "answer": ""
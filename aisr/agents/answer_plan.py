@@ -3,16 +3,15 @@
 
 作为研究结果综合阶段的组件，负责设计最终答案的结构框架。
 """
-from datetime import datetime
-import logging
+from datetime import date
 from typing import Dict, Any, List
-import json
 
-from aisr.agents.base import Agent
-from aisr.utils import logging_utils
+from aisr.agents.base import AsyncAgent, make_cache_key, render_sub_answers
+from aisr.core.llm_provider import ChatMessage
+from aisr.utils import json_utils, logging_utils
 logger = logging_utils.get_logger(__name__, color="green")
 
-class AnswerPlanAgent(Agent):
+class AnswerPlanAgent(AsyncAgent):
     """
     答案规划代理，为最终答案设计结构大纲。
 
@@ -24,7 +23,66 @@ class AnswerPlanAgent(Agent):
     - 最终答案的结构大纲
     """
 
-    def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
+    # 函数调用模式在类加载时定义一次，避免每次调用重新分配dict字面量
+    FUNCTIONS = [{
+        "name": "generate_answer_outline",
+        "description": "为最终答案生成结构化大纲",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "outline": {
+                    "type": "string",
+                    "description": "最终答案的结构大纲"
+                }
+            },
+            "required": ["outline"]
+        }
+    }]
+
+    # LLM未返回预期函数调用时的降级返回值
+    ERROR_PAYLOAD = {
+        "error": "生成答案大纲失败",
+        "outline": "无法基于提供的信息生成答案大纲。"
+    }
+
+    # 系统提示为全静态文本，类加载时定义一次，每次调用直接复用
+    SYSTEM_PROMPT = """你是一位资深研究报告编辑，擅长设计清晰、有条理的报告结构。
+
+你的职责是：
+1. 分析研究问题和所有已收集的信息
+2. 设计一个逻辑清晰的结构大纲
+3. 确保大纲能够全面涵盖所有关键发现
+4. 为最终答案提供一个易于理解的框架
+
+设计原则：
+- 从总体到细节的结构安排
+- 逻辑流畅，各部分之间有自然过渡
+- 优先处理核心问题和关键发现
+- 确保全面性，不遗漏重要信息
+- 适当分组相关主题
+- 考虑读者视角，确保易于理解
+
+大纲格式：
+- 使用标准的大纲格式，包括主要部分和子部分
+- 每个部分应有简短描述，说明包含的内容
+- 可以使用编号或层级格式
+
+你的大纲将作为生成最终答案的框架，因此应该清晰、全面且结构合理。"""
+
+    def __init__(self, llm_provider, memory):
+        """
+        初始化答案规划代理。
+
+        Args:
+            llm_provider: LLM提供者实例
+            memory: 记忆实例
+        """
+        super().__init__(llm_provider, memory)
+        # 大纲缓存：同一(query, sub_answers)组合在研究迭代间经常不变，
+        # 命中缓存可直接省掉一次LLM往返
+        self._outline_cache: Dict[str, Dict[str, Any]] = {}
+
+    async def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """
         执行答案规划，生成最终答案的结构大纲。
 
@@ -46,42 +104,25 @@ class AnswerPlanAgent(Agent):
         if not sub_answers:
             logger.warning("未提供任何子答案，将基于查询生成通用大纲")
 
-        # 构建提示
-        prompt = self.build_prompt(context)
-
-        # 调用LLM生成答案大纲
-        functions = [{
-            "name": "generate_answer_outline",
-            "description": "为最终答案生成结构化大纲",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "outline": {
-                        "type": "string",
-                        "description": "最终答案的结构大纲"
-                    }
-                },
-                "required": ["outline"]
-            }
-        }]
-
-        result = self.llm.generate_with_function_calling(prompt, functions)
-
-        if "name" not in result or result["name"] != "generate_answer_outline":
-            # 处理LLM未返回预期函数调用的情况
-            logger.error("LLM未返回答案大纲生成函数调用")
-            error_response = {
-                "error": "生成答案大纲失败",
-                "outline": "无法基于提供的信息生成答案大纲。"
-            }
-            return error_response
-
-        # 返回答案大纲
+        # 输入未变化时直接复用已生成的大纲
+        cache_key = make_cache_key({"query": query, "sub_answers": sub_answers})
+        cached = self._outline_cache.get(cache_key)
+        if cached is not None:
+            logger.info("命中大纲缓存，跳过LLM调用")
+            return cached
+
+        # 构建提示并调用LLM生成答案大纲
+        result = await self._execute_function_call(
+            context, self.FUNCTIONS, "generate_answer_outline", self.ERROR_PAYLOAD)
+
+        if "error" not in result:
+            self._outline_cache[cache_key] = result
+
         logger.info(f"生成大纲:")
-        logger.info(result["arguments"].get("outline", ""))
-        return result["arguments"]
+        logger.info(result.get("outline", ""))
+        return result
 
-    def build_prompt(self, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def build_prompt(self, context: Dict[str, Any]) -> List[ChatMessage]:
         """
         构建LLM提示。
 
@@ -94,25 +135,26 @@ class AnswerPlanAgent(Agent):
         messages = []
 
         # 系统提示
-        system_prompt = self._get_system_prompt()
-        messages.append({"role": "system", "content": system_prompt})
+        messages.append(ChatMessage("system", self._get_system_prompt()))
 
         # 构建用户提示
         query = context.get("query", "")
         sub_answers = context.get("sub_answers", {})
-        user_prompt = f"我需要基于以下信息，为研究问题的最终答案设计结构大纲:\n\n"
-        user_prompt += f"## 原始查询\n{query}\n\n"
+        # 日期属于动态内容，放入用户消息以保持系统提示前缀稳定；
+        # date.today().isoformat()跳过时间字段且使用固定格式，比strftime更快
+        formatted_date = date.today().isoformat()
+        # 用列表收集片段，最后一次join，避免重复字符串拼接的二次开销
+        prompt_parts = [f"now date:{formatted_date}\n我需要基于以下信息，为研究问题的最终答案设计结构大纲:\n\n"]
+        prompt_parts.append(f"## 原始查询\n{query}\n\n")
 
         # 添加所有子答案
         if sub_answers:
-            user_prompt += "## 子任务答案\n\n"
-            for task_id, answer in sub_answers.items():
-                user_prompt += f"### 任务: {task_id}\n"
-                user_prompt += f"{str(answer)}\n\n"
+            prompt_parts.append("## 子任务答案\n\n")
+            prompt_parts.append(render_sub_answers(sub_answers))
 
-        user_prompt += "\n\n请基于上述信息，设计一个清晰、结构化的大纲，用于组织最终答案。"
+        prompt_parts.append("\n\n请基于上述信息，设计一个清晰、结构化的大纲，用于组织最终答案。")
 
-        messages.append({"role": "user", "content": user_prompt})
+        messages.append(ChatMessage("user", "".join(prompt_parts)))
 
         return messages
 
@@ -123,29 +165,7 @@ class AnswerPlanAgent(Agent):
         Returns:
             系统提示字符串
         """
-        formatted_date = datetime.now().strftime("%Y-%m-%d")
-        return f"""now date:{formatted_date}\n你是一位资深研究报告编辑，擅长设计清晰、有条理的报告结构。
-
-你的职责是：
-1. 分析研究问题和所有已收集的信息
-2. 设计一个逻辑清晰的结构大纲
-3. 确保大纲能够全面涵盖所有关键发现
-4. 为最终答案提供一个易于理解的框架
-
-设计原则：
-- 从总体到细节的结构安排
-- 逻辑流畅，各部分之间有自然过渡
-- 优先处理核心问题和关键发现
-- 确保全面性，不遗漏重要信息
-- 适当分组相关主题
-- 考虑读者视角，确保易于理解
-
-大纲格式：
-- 使用标准的大纲格式，包括主要部分和子部分
-- 每个部分应有简短描述，说明包含的内容
-- 可以使用编号或层级格式
-
-你的大纲将作为生成最终答案的框架，因此应该清晰、全面且结构合理。"""
+        return self.SYSTEM_PROMPT
 
     def parse_response(self, response: str) -> Dict[str, Any]:
         """
@@ -160,10 +180,10 @@ class AnswerPlanAgent(Agent):
         # 由于使用function calling，此方法在当前实现中不会被调用
         # 保留此方法以符合Agent抽象基类要求
         try:
-            parsed = json.loads(response)
+            parsed = json_utils.loads(response)
             return parsed
-        except:
-            logger.error(f"解析答案大纲响应失败: {response}")
+        except (ValueError, TypeError) as e:
+            logger.error("解析答案大纲响应失败: %s; 响应: %.200s", e, response)
             return {
                 "error": "解析响应失败",
                 "outline": ""
@@ -1,7 +1,126 @@
 import abc
-from typing import Dict, Any
+import hashlib
+from typing import Any, Dict, List
 from aisr.core.base import Component
 
+from aisr.utils import json_utils, logging_utils
+logger = logging_utils.get_logger(__name__, color="green")
+
+# 子答案在提示中的最大字符数，避免原始dict整体进入提示放大token消耗
+SUB_ANSWER_MAX_CHARS = 1500
+
+# 预绑定的模板format方法：循环内复用同一模板对象，
+# 避免f-string每次迭代的FORMAT_VALUE字节码开销
+_TASK_BLOCK = "### 任务: {task_id}\n{answer}\n\n".format
+
+
+def summarize_sub_answer(answer: Any, max_chars: int = SUB_ANSWER_MAX_CHARS) -> str:
+    """
+    将子答案压缩为有界的提示文本。
+
+    同一个子答案会依次进入洞察、答案规划和最终答案三个智能体的提示，
+    这里只提取最终回答文本并截断，而不是序列化整个结果字典；
+    对dict类型的子答案将摘要缓存在"_summary"键上，供后续智能体复用，
+    同时保证各智能体看到字节一致的内容，利于提示前缀缓存。
+
+    Args:
+        answer: 子答案，可能是纯文本或包含"answer"键的结果字典
+        max_chars: 摘要的最大字符数
+
+    Returns:
+        截断后的子答案文本
+    """
+    if isinstance(answer, dict):
+        cached = answer.get("_summary")
+        if cached is not None:
+            return cached
+
+        text = answer.get("answer") or str(answer)
+        if len(text) > max_chars:
+            text = text[:max_chars] + "...(内容已截断)"
+
+        answer["_summary"] = text
+        return text
+
+    text = str(answer)
+    if len(text) > max_chars:
+        text = text[:max_chars] + "...(内容已截断)"
+    return text
+
+
+def render_sub_answers(sub_answers: Dict[str, Any]) -> str:
+    """
+    将子答案字典渲染为提示文本块。
+
+    洞察、答案规划和最终答案三个智能体的提示中包含相同的子答案块，
+    统一渲染保证三者拿到字节一致的文本（利于提示前缀缓存）。
+    单条子答案的摘要已由summarize_sub_answer缓存，重复渲染只剩
+    一次join的开销。
+
+    Args:
+        sub_answers: 子答案字典 {task_id: answer}
+
+    Returns:
+        渲染后的提示文本块
+    """
+    return "".join(
+        _TASK_BLOCK(task_id=task_id, answer=summarize_sub_answer(answer))
+        for task_id, answer in sub_answers.items()
+    )
+
+
+def truncate_text(value: Any, limit: int, suffix: str = "") -> str:
+    """
+    提取值的文本表示并截断到限定长度。
+
+    dict形态的子答案直接取"answer"键的文本，避免为了截取前几百个
+    字符而先物化整个结果字典的repr；其他类型仅在str()之后做一次
+    切片，工作量以limit为界。
+
+    Args:
+        value: 待截断的值，可能是纯文本或包含"answer"键的结果字典
+        limit: 最大字符数
+        suffix: 截断发生时附加的后缀
+
+    Returns:
+        截断后的文本
+    """
+    if isinstance(value, dict):
+        text = value.get("answer") or str(value)
+    else:
+        text = str(value)
+    if len(text) > limit:
+        return text[:limit] + suffix
+    return text
+
+
+def _strip_private_keys(value: Any) -> Any:
+    """递归去除dict中以下划线开头的内部注记键（如"_summary"）。"""
+    if isinstance(value, dict):
+        return {k: _strip_private_keys(v) for k, v in value.items()
+                if not (isinstance(k, str) and k.startswith("_"))}
+    if isinstance(value, list):
+        return [_strip_private_keys(item) for item in value]
+    return value
+
+
+def make_cache_key(payload: Any) -> str:
+    """
+    基于输入内容生成稳定的缓存键。
+
+    对输入做规范化JSON序列化（键排序、剔除下划线开头的内部注记键）
+    后取blake2b摘要，保证相同内容在不同调用间产生相同的键。
+
+    Args:
+        payload: 参与缓存键计算的输入内容
+
+    Returns:
+        十六进制摘要字符串
+    """
+    canonical = json_utils.dumps_canonical(_strip_private_keys(payload))
+    return hashlib.blake2b(canonical, digest_size=16).hexdigest()
+
+
 class Agent(Component):
     """
     AISR中所有LLM驱动智能体的抽象基类。
@@ -34,3 +153,89 @@ class Agent(Component):
     def parse_response(self, response: str) -> Dict[str, Any]:
         """将LLM响应解析为结构化输出"""
         pass
+
+    def _execute_function_call(self, context: Dict[str, Any], functions: List[Dict[str, Any]],
+                               expected_name: str, error_payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        构建提示、执行函数调用并校验返回的函数名。
+
+        各智能体execute中"构建提示 -> 调用LLM -> 校验函数名 -> 取arguments"
+        的公共骨架集中在此，子类只需提供类级FUNCTIONS模式和错误负载。
+
+        Args:
+            context: 输入上下文
+            functions: 函数调用模式列表（通常为类级常量）
+            expected_name: 期望LLM返回的函数名
+            error_payload: LLM未返回预期函数调用时的降级返回值
+
+        Returns:
+            函数调用的arguments字典，失败时返回error_payload的副本
+        """
+        prompt = self.build_prompt(context)
+        result = self.llm.generate_with_function_calling(prompt, functions)
+
+        if "name" not in result or result["name"] != expected_name:
+            logger.error(f"LLM未返回预期的函数调用: {expected_name}")
+            return dict(error_payload)
+
+        return result["arguments"]
+
+
+class AsyncAgent(Component):
+    """
+    AISR中异步LLM驱动智能体的抽象基类。
+
+    与Agent相同的职责，但execute和build_prompt为协程，
+    LLM调用通过异步客户端执行，便于多个智能体并发重叠网络等待。
+    """
+
+    def __init__(self, llm_provider, memory):
+        """
+        初始化异步智能体。
+
+        Args:
+            llm_provider: LLM服务提供者，需提供异步生成接口
+            memory: 智能体的内存系统
+        """
+        self.llm = llm_provider
+        self.memory = memory
+
+    @abc.abstractmethod
+    async def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """异步执行智能体的推理任务"""
+        pass
+
+    @abc.abstractmethod
+    async def build_prompt(self, context: Dict[str, Any]) -> str:
+        """基于上下文和内存为LLM构建提示"""
+        pass
+
+    @abc.abstractmethod
+    def parse_response(self, response: str) -> Dict[str, Any]:
+        """将LLM响应解析为结构化输出"""
+        pass
+
+    async def _execute_function_call(self, context: Dict[str, Any], functions: List[Dict[str, Any]],
+                                     expected_name: str, error_payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        异步构建提示、执行函数调用并校验返回的函数名。
+
+        与Agent._execute_function_call相同的公共骨架，基于异步LLM接口。
+
+        Args:
+            context: 输入上下文
+            functions: 函数调用模式列表（通常为类级常量）
+            expected_name: 期望LLM返回的函数名
+            error_payload: LLM未返回预期函数调用时的降级返回值
+
+        Returns:
+            函数调用的arguments字典，失败时返回error_payload的副本
+        """
+        prompt = await self.build_prompt(context)
+        result = await self.llm.generate_with_function_calling_async(prompt, functions)
+
+        if "name" not in result or result["name"] != expected_name:
+            logger.error(f"LLM未返回预期的函数调用: {expected_name}")
+            return dict(error_payload)
+
+        return result["arguments"]
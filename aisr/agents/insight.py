@@ -4,16 +4,15 @@
 作为外层循环的反馈组件，负责评估研究进展并指导后续任务规划。
 """
 
-import logging
-from datetime import datetime
+from datetime import date
 from typing import Dict, Any, List
-import json
 
-from aisr.agents.base import Agent
-from aisr.utils import logging_utils
+from aisr.agents.base import AsyncAgent, render_sub_answers
+from aisr.core.llm_provider import ChatMessage
+from aisr.utils import json_utils, logging_utils
 logger = logging_utils.get_logger(__name__, color="green")
 
-class InsightAgent(Agent):
+class InsightAgent(AsyncAgent):
     """
     洞察生成代理，分析已有子答案并生成研究洞察。
 
@@ -26,7 +25,47 @@ class InsightAgent(Agent):
     - 对当前研究进展的洞察
     """
 
-    def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
+    # 函数调用模式在类加载时定义一次，避免每次调用重新分配dict字面量
+    FUNCTIONS = [{
+        "name": "generate_insight",
+        "description": "分析子答案并生成对研究进展的洞察",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "insight": {
+                    "type": "string",
+                    "description": "对当前研究进展的综合洞察"
+                }
+            },
+            "required": ["insight"]
+        }
+    }]
+
+    # LLM未返回预期函数调用时的降级返回值
+    ERROR_PAYLOAD = {
+        "error": "生成研究洞察失败",
+        "insight": "无法基于提供的子答案生成洞察。"
+    }
+
+    # 系统提示为全静态文本，类加载时定义一次，每次调用直接复用
+    SYSTEM_PROMPT = """你是一位资深研究顾问，擅长分析研究进展并提供战略性洞察。
+
+你的职责是：
+1. 分析已完成任务的答案和剩余的研究计划
+2. 识别关键的发现、模式和矛盾
+3. 评估当前研究进展
+4. 提出对研究方向的建议
+
+分析思路：
+- 识别已有答案中的共同主题和关键发现
+- 注意信息间的冲突或不一致
+- 找出研究中的知识缺口
+- 考虑原始查询的目标是否正在得到有效解答
+- 评估剩余任务计划是否仍然合理，或是否需要调整
+
+你的洞察应该是全面、深入和有建设性的，帮助指导研究的下一步。"""
+
+    async def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """
         执行子答案分析，生成研究洞察。
 
@@ -49,42 +88,15 @@ class InsightAgent(Agent):
         if not sub_answers:
             logger.warning("未提供任何子答案，将生成基于查询的初步洞察")
 
-        # 构建提示
-        prompt = self.build_prompt(context)
-
-        # 调用LLM生成洞察
-        functions = [{
-            "name": "generate_insight",
-            "description": "分析子答案并生成对研究进展的洞察",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "insight": {
-                        "type": "string",
-                        "description": "对当前研究进展的综合洞察"
-                    }
-                },
-                "required": ["insight"]
-            }
-        }]
-
-        result = self.llm.generate_with_function_calling(prompt, functions)
-
-        if "name" not in result or result["name"] != "generate_insight":
-            # 处理LLM未返回预期函数调用的情况
-            logger.error("LLM未返回洞察生成函数调用")
-            error_response = {
-                "error": "生成研究洞察失败",
-                "insight": "无法基于提供的子答案生成洞察。"
-            }
-            return error_response
+        # 构建提示并调用LLM生成洞察
+        result = await self._execute_function_call(
+            context, self.FUNCTIONS, "generate_insight", self.ERROR_PAYLOAD)
 
         logger.info(f"生成insight:")
-        logger.info(result["arguments"].get("insight", ""))
-        # 返回洞察
-        return result["arguments"]
+        logger.info(result.get("insight", ""))
+        return result
 
-    def build_prompt(self, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def build_prompt(self, context: Dict[str, Any]) -> List[ChatMessage]:
         """
         构建LLM提示。
 
@@ -97,34 +109,35 @@ class InsightAgent(Agent):
         messages = []
 
         # 系统提示
-        system_prompt = self._get_system_prompt()
-        messages.append({"role": "system", "content": system_prompt})
+        messages.append(ChatMessage("system", self._get_system_prompt()))
 
         # 构建用户提示
         query = context.get("query", "")
         sub_answers = context.get("sub_answers", {})
         unexecuted_plan = context.get("unexecuted_plan", {})
 
-        user_prompt = f"我需要基于以下信息，生成研究洞察:\n\n"
-        user_prompt += f"## 原始查询\n{query}\n\n"
+        # 日期属于动态内容，放入用户消息以保持系统提示前缀稳定；
+        # date.today().isoformat()跳过时间字段且使用固定格式，比strftime更快
+        formatted_date = date.today().isoformat()
+        # 用列表收集片段，最后一次join，避免重复字符串拼接的二次开销
+        prompt_parts = [f"now date:{formatted_date}\n我需要基于以下信息，生成研究洞察:\n\n"]
+        prompt_parts.append(f"## 原始查询\n{query}\n\n")
 
         # 添加已完成任务的子答案
         if sub_answers:
-            user_prompt += "## 已完成的子任务答案\n\n"
-            for task_id, answer in sub_answers.items():
-                user_prompt += f"### 任务: {task_id}\n"
-                user_prompt += f"{str(answer)}\n\n"
+            prompt_parts.append("## 已完成的子任务答案\n\n")
+            prompt_parts.append(render_sub_answers(sub_answers))
 
         # 添加未执行的任务计划
         if unexecuted_plan:
-            user_prompt += "## 未执行的任务计划\n\n"
+            prompt_parts.append("## 未执行的任务计划\n\n")
             sub_tasks = unexecuted_plan.get("sub_tasks", [])
             for task in sub_tasks:
-                user_prompt += f"- {task.get('title', '')}: {task.get('description', '')}\n"
+                prompt_parts.append(f"- {task.get('title', '')}: {task.get('description', '')}\n")
 
-        user_prompt += "\n\n请基于上述信息，分析当前研究进展并生成洞察。"
+        prompt_parts.append("\n\n请基于上述信息，分析当前研究进展并生成洞察。")
 
-        messages.append({"role": "user", "content": user_prompt})
+        messages.append(ChatMessage("user", "".join(prompt_parts)))
 
         return messages
 
@@ -135,23 +148,7 @@ class InsightAgent(Agent):
         Returns:
             系统提示字符串
         """
-        formatted_date = datetime.now().strftime("%Y-%m-%d")
-        return f"""now date:{formatted_date}\n你是一位资深研究顾问，擅长分析研究进展并提供战略性洞察。
-
-你的职责是：
-1. 分析已完成任务的答案和剩余的研究计划
-2. 识别关键的发现、模式和矛盾
-3. 评估当前研究进展
-4. 提出对研究方向的建议
-
-分析思路：
-- 识别已有答案中的共同主题和关键发现
-- 注意信息间的冲突或不一致
-- 找出研究中的知识缺口
-- 考虑原始查询的目标是否正在得到有效解答
-- 评估剩余任务计划是否仍然合理，或是否需要调整
-
-你的洞察应该是全面、深入和有建设性的，帮助指导研究的下一步。"""
+        return self.SYSTEM_PROMPT
 
     def parse_response(self, response: str) -> Dict[str, Any]:
         """
@@ -166,10 +163,10 @@ class InsightAgent(Agent):
         # 由于使用function calling，此方法在当前实现中不会被调用
         # 保留此方法以符合Agent抽象基类要求
         try:
-            parsed = json.loads(response)
+            parsed = json_utils.loads(response)
             return parsed
-        except:
-            logger.error(f"解析洞察响应失败: {response}")
+        except (ValueError, TypeError) as e:
+            logger.error("解析洞察响应失败: %s; 响应: %.200s", e, response)
             return {
                 "error": "解析响应失败",
                 "insight": ""
@@ -6,15 +6,15 @@
 """
 
 import logging
-from datetime import datetime
+from datetime import date
 from typing import Dict, Any, List
-import json
 
-from aisr.agents.base import Agent
-from aisr.utils import logging_utils
+from aisr.agents.base import AsyncAgent, truncate_text
+from aisr.core.llm_provider import ChatMessage
+from aisr.utils import json_utils, logging_utils
 logger = logging_utils.get_logger(__name__, color="green")
 
-class SearchPlanAgent(Agent):
+class SearchPlanAgent(AsyncAgent):
     """
     搜索规划代理，为子任务生成有效的搜索查询。
 
@@ -26,7 +26,57 @@ class SearchPlanAgent(Agent):
     - 搜索查询列表
     """
 
-    def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
+    # 函数调用模式在类加载时定义一次，避免每次调用重新分配dict字面量
+    FUNCTIONS = [{
+        "name": "search_planning",
+        "description": "为子任务生成有效的搜索查询列表",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "queries": {
+                    "type": "array",
+                    "description": "搜索查询列表",
+                    "items": {
+                        "type": "string",
+                        "description": "搜索查询"
+                    }
+                },
+                "reasoning": {
+                    "type": "string",
+                    "description": "查询生成的推理过程"
+                }
+            },
+            "required": ["queries", "reasoning"]
+        }
+    }]
+
+    # 系统提示为全静态文本，类加载时定义一次，每次调用直接复用
+    SYSTEM_PROMPT = """你是一位资深搜索专家，擅长将研究任务转化为有效的搜索查询。
+
+你的职责是：
+1. 分析给定的研究子任务
+2. 生成1-3个有效的搜索查询
+3. 确保查询能够覆盖任务的关键方面
+4. 考虑如何最大化相关信息的检索效果
+
+查询设计原则：
+- 使用精确的关键词和术语
+- 尝试不同的表述方式以覆盖更多相关内容
+- 考虑使用专业术语和同义词
+- 适当添加限定词以提高精确度
+- 从一般到具体，确保覆盖不同深度的信息
+- 如果有前序搜索结果，考虑如何改进查询
+- 对于专用名词，使用原语言进行搜索，不进行不必要的翻译，避免信息遗漏
+
+请注意：
+- 生成的查询应该简洁明了，每个查询专注于一个明确的信息需求
+- 避免过于宽泛或过于狭窄的查询
+- 不要包含特殊搜索运算符，如引号、加号或减号
+- 提供详细的推理过程，解释你的查询设计思路
+
+你的输出将直接用于网络搜索，因此请确保查询有效且针对性强。"""
+
+    async def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """
         执行搜索规划，为子任务生成搜索查询列表。
 
@@ -45,51 +95,30 @@ class SearchPlanAgent(Agent):
             raise ValueError("搜索规划必须提供子任务")
 
         # 构建提示
-        prompt = self.build_prompt(context)
+        prompt = await self.build_prompt(context)
 
         # 调用LLM生成搜索规划
-        functions = [{
-            "name": "search_planning",
-            "description": "为子任务生成有效的搜索查询列表",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "queries": {
-                        "type": "array",
-                        "description": "搜索查询列表",
-                        "items": {
-                            "type": "string",
-                            "description": "搜索查询"
-                        }
-                    },
-                    "reasoning": {
-                        "type": "string",
-                        "description": "查询生成的推理过程"
-                    }
-                },
-                "required": ["queries", "reasoning"]
-            }
-        }]
-
-        result = self.llm.generate_with_function_calling(prompt, functions)
+        result = await self.llm.generate_with_function_calling_async(prompt, self.FUNCTIONS)
 
         if "name" not in result or result["name"] != "search_planning":
             # 处理LLM未返回预期函数调用的情况
-            logging.error("LLM未返回搜索规划函数调用")
+            logger.error("LLM未返回搜索规划函数调用")
             error_response = {
                 "error": "生成搜索规划失败",
                 "queries": []
             }
             return error_response
 
-        logger.info(f"生成search queries:")
-        logger.info(result["arguments"].get("queries", ""))
-        logger.info(f"生成reasoning:")
-        logger.info(result["arguments"].get("reasoning", ""))
+        # 结果内容可能很长，先判断日志级别再格式化，避免无效开销
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"生成search queries:")
+            logger.info(result["arguments"].get("queries", ""))
+            logger.info(f"生成reasoning:")
+            logger.info(result["arguments"].get("reasoning", ""))
         # 返回搜索规划结果
         return result["arguments"]
 
-    def build_prompt(self, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def build_prompt(self, context: Dict[str, Any]) -> List[ChatMessage]:
         """
         构建LLM提示。
 
@@ -102,25 +131,28 @@ class SearchPlanAgent(Agent):
         messages = []
 
         # 系统提示
-        system_prompt = self._get_system_prompt()
-        messages.append({"role": "system", "content": system_prompt})
+        messages.append(ChatMessage("system", self._get_system_prompt()))
 
         # 当前任务
         task = context.get("task", {})
         task_title = task.get("title", "")
         task_description = task.get("description", "")
 
-        user_prompt = f"我需要为以下研究子任务生成搜索查询:\n\n"
-        user_prompt += f"## 任务标题\n{task_title}\n\n"
-        user_prompt += f"## 任务描述\n{task_description}\n\n"
-        user_prompt += "请生成有效的搜索查询列表，以帮助我找到相关信息。"
+        # 日期属于动态内容，放入用户消息以保持系统提示前缀稳定；
+        # date.today().isoformat()跳过时间字段且使用固定格式，比strftime更快
+        formatted_date = date.today().isoformat()
+        # 用列表收集片段，最后一次join，避免重复字符串拼接的二次开销
+        prompt_parts = [f"now date:{formatted_date}\n我需要为以下研究子任务生成搜索查询:\n\n"]
+        prompt_parts.append(f"## 任务标题\n{task_title}\n\n")
+        prompt_parts.append(f"## 任务描述\n{task_description}\n\n")
+        prompt_parts.append("请生成有效的搜索查询列表，以帮助我找到相关信息。")
 
         # 添加历史信息（如果有）
         history_context = self._format_history_context(context)
         if history_context:
-            user_prompt += history_context
+            prompt_parts.append(history_context)
 
-        messages.append({"role": "user", "content": user_prompt})
+        messages.append(ChatMessage("user", "".join(prompt_parts)))
 
         return messages
 
@@ -131,31 +163,7 @@ class SearchPlanAgent(Agent):
         Returns:
             系统提示字符串
         """
-        formatted_date = datetime.now().strftime("%Y-%m-%d")
-        return f"""now date:{formatted_date}\n你是一位资深搜索专家，擅长将研究任务转化为有效的搜索查询。
-
-你的职责是：
-1. 分析给定的研究子任务
-2. 生成1-3个有效的搜索查询
-3. 确保查询能够覆盖任务的关键方面
-4. 考虑如何最大化相关信息的检索效果
-
-查询设计原则：
-- 使用精确的关键词和术语
-- 尝试不同的表述方式以覆盖更多相关内容
-- 考虑使用专业术语和同义词
-- 适当添加限定词以提高精确度
-- 从一般到具体，确保覆盖不同深度的信息
-- 如果有前序搜索结果，考虑如何改进查询
-- 对于专用名词，使用原语言进行搜索，不进行不必要的翻译，避免信息遗漏
-
-请注意：
-- 生成的查询应该简洁明了，每个查询专注于一个明确的信息需求
-- 避免过于宽泛或过于狭窄的查询
-- 不要包含特殊搜索运算符，如引号、加号或减号
-- 提供详细的推理过程，解释你的查询设计思路
-
-你的输出将直接用于网络搜索，因此请确保查询有效且针对性强。"""
+        return self.SYSTEM_PROMPT
 
     def _format_history_context(self, context: Dict[str, Any]) -> str:
         """
@@ -167,8 +175,6 @@ class SearchPlanAgent(Agent):
         Returns:
             格式化的历史上下文字符串，如果没有历史信息则返回空字符串
         """
-        history_text = ""
-
         # 检查是否有历史信息
         has_history = (
                 context.get("previous_search_plans") or
@@ -179,40 +185,40 @@ class SearchPlanAgent(Agent):
         if not has_history:
             return ""
 
-        history_text = "\n\n## 历史搜索信息\n"
+        # 用列表收集片段，最后一次join，避免O(n^2)的字符串拼接
+        history_parts = ["\n\n## 历史搜索信息\n"]
 
         # 添加前序搜索计划
         previous_search_plans = context.get("previous_search_plans", [])
         if previous_search_plans:
-            history_text += "\n### 前序搜索查询\n"
+            history_parts.append("\n### 前序搜索查询\n")
             for i, plan in enumerate(previous_search_plans):
-                history_text += f"\n尝试 {i + 1}:\n"
+                history_parts.append(f"\n尝试 {i + 1}:\n")
 
                 queries = plan.get("queries", [])
                 if queries:
                     for query in queries:
-                        history_text += f"- {query}\n"
+                        history_parts.append(f"- {query}\n")
 
         # 添加前序子答案
         previous_sub_answer = context.get("previous_sub_answer")
         if previous_sub_answer:
-            history_text += "\n### 前序搜索结果\n"
-            # 直接使用子答案作为文本，不假设特定的结构
-            history_text += f"{str(previous_sub_answer)[:300]}...\n"
+            history_parts.append("\n### 前序搜索结果\n")
+            history_parts.append(f"{truncate_text(previous_sub_answer, 300)}...\n")
 
         # 添加相关任务的答案
         related_tasks_answers = context.get("related_tasks_answers", {})
         if related_tasks_answers:
-            history_text += "\n### 相关任务的答案\n"
+            history_parts.append("\n### 相关任务的答案\n")
             for task_id, answer in related_tasks_answers.items():
-                history_text += f"\n任务ID: {task_id}\n"
+                history_parts.append(f"\n任务ID: {task_id}\n")
                 # 添加答案的摘要
-                answer_summary = str(answer)[:200] + "..." if len(str(answer)) > 200 else str(answer)
-                history_text += f"答案: {answer_summary}\n"
+                answer_summary = truncate_text(answer, 200, suffix="...")
+                history_parts.append(f"答案: {answer_summary}\n")
 
-        history_text += "\n\n请基于上述历史信息和当前任务，设计更有效的搜索查询。如果前序查询存在不足，请加以改进；如果前序结果已经包含一些有用信息，请设计查询以获取更深入或补充的信息。如果相关任务的答案中已包含某些信息，请避免重复搜索相同内容，转而专注于填补信息缺口。\n"
+        history_parts.append("\n\n请基于上述历史信息和当前任务，设计更有效的搜索查询。如果前序查询存在不足，请加以改进；如果前序结果已经包含一些有用信息，请设计查询以获取更深入或补充的信息。如果相关任务的答案中已包含某些信息，请避免重复搜索相同内容，转而专注于填补信息缺口。\n")
 
-        return history_text
+        return "".join(history_parts)
 
     def parse_response(self, response: str) -> Dict[str, Any]:
         """
@@ -227,10 +233,10 @@ class SearchPlanAgent(Agent):
         # 由于使用function calling，此方法在当前实现中不会被调用
         # 保留此方法以符合Agent抽象基类要求
         try:
-            parsed = json.loads(response)
+            parsed = json_utils.loads(response)
             return parsed
-        except:
-            logging.error(f"解析搜索规划响应失败: {response}")
+        except (ValueError, TypeError) as e:
+            logger.error("解析搜索规划响应失败: %s; 响应: %.200s", e, response)
             return {
                 "error": "解析响应失败",
                 "queries": []
@@ -4,16 +4,27 @@
 作为内层工作流的关键组件，负责将原始搜索结果转化为对子任务的直接回答。
 """
 
-import logging
-from datetime import datetime
+import asyncio
+from datetime import date
 from typing import Dict, Any, List
-import json
 
-from aisr.agents.base import Agent
-from aisr.utils import logging_utils
+from aisr.agents.base import AsyncAgent
+from aisr.core.llm_provider import ChatMessage
+from aisr.utils import json_utils, logging_utils
 logger = logging_utils.get_logger(__name__, color="green")
 
-class SubAnswerAgent(Agent):
+# 截断后缀作为模块常量，避免在结果循环中反复创建字面量
+_TRUNC_SUFFIX = "...(内容已截断)"
+
+# 预绑定的模板format方法：循环内复用同一模板对象，
+# 避免f-string每次迭代的FORMAT_VALUE字节码开销
+_RESULT_HEADER = "### 结果 {index}\n".format
+_RESULT_TITLE = "**标题**: {title}\n\n".format
+_RESULT_URL = "**来源**: {url}\n\n".format
+_RESULT_CONTENT = "**内容**:\n{content}\n\n".format
+_RESULT_SNIPPET = "**摘要**:\n{snippet}\n\n".format
+
+class SubAnswerAgent(AsyncAgent):
     """
     子答案生成代理，分析搜索结果并生成子任务的回答。
 
@@ -25,7 +36,71 @@ class SubAnswerAgent(Agent):
     - 子任务的回答
     """
 
-    def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
+    # 函数调用模式在类加载时定义一次，避免每次调用重新分配dict字面量
+    FUNCTIONS = [{
+        "name": "generate_sub_answer",
+        "description": "分析搜索结果并生成对子任务的回答",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "answer": {
+                    "type": "string",
+                    "description": "对子任务的综合回答"
+                }
+            },
+            "required": ["answer"]
+        }
+    }]
+
+    # LLM未返回预期函数调用时的降级返回值
+    ERROR_PAYLOAD = {
+        "error": "生成子答案失败",
+        "answer": "无法基于提供的搜索结果生成回答。"
+    }
+
+    # 融合批量模式：单次函数调用返回所有子任务的回答，
+    # 把N次HTTP往返的TLS与排队开销摊薄为一次
+    BATCH_FUNCTIONS = [{
+        "name": "generate_sub_answers",
+        "description": "分析各子任务的搜索结果，分别生成对每个子任务的回答",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "answers": {
+                    "type": "array",
+                    "description": "回答列表，与输入的子任务一一对应",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "task_id": {"type": "string", "description": "子任务ID"},
+                            "answer": {"type": "string", "description": "对该子任务的综合回答"}
+                        },
+                        "required": ["task_id", "answer"]
+                    }
+                }
+            },
+            "required": ["answers"]
+        }
+    }]
+
+    # 系统提示为全静态文本，类加载时定义一次，每次调用直接复用
+    SYSTEM_PROMPT = """你是一位资深研究分析师，擅长从搜索结果中提取和综合信息，生成对特定问题的深入回答。
+
+你的职责是：
+1. 分析提供的搜索结果
+2. 提取与子任务相关的关键信息
+3. 综合这些信息生成连贯、全面的回答
+
+分析原则：
+- 保持客观，以事实和证据为基础
+- 整合多个来源的信息，寻找共识和分歧
+- 适当引用信息来源，确保可追溯性
+- 区分确定的事实和推测的内容
+- 注意信息的时效性和相关性
+
+你应该提供一个综合性的回答，直接针对子任务。你的回答应该全面但简洁，涵盖搜索结果中的主要信息。"""
+
+    async def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """
         执行搜索结果分析，生成子任务的回答。
 
@@ -45,45 +120,75 @@ class SubAnswerAgent(Agent):
             raise ValueError("子答案生成必须提供子任务")
 
         if not search_results:
-            logging.warning("未提供搜索结果，将生成基于任务的推测性回答")
+            logger.warning("未提供搜索结果，将生成基于任务的推测性回答")
             search_results = {"results": []}
 
-        # 构建提示
-        prompt = self.build_prompt(context)
-
-        # 调用LLM生成子答案
-        functions = [{
-            "name": "generate_sub_answer",
-            "description": "分析搜索结果并生成对子任务的回答",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "answer": {
-                        "type": "string",
-                        "description": "对子任务的综合回答"
-                    }
-                },
-                "required": ["answer"]
-            }
-        }]
-
-        result = self.llm.generate_with_function_calling(prompt, functions)
-
-        if "name" not in result or result["name"] != "generate_sub_answer":
-            # 处理LLM未返回预期函数调用的情况
-            logging.error("LLM未返回子答案生成函数调用")
-            error_response = {
-                "error": "生成子答案失败",
-                "answer": "无法基于提供的搜索结果生成回答。"
-            }
-            return error_response
+        # 构建提示并调用LLM生成子答案
+        result = await self._execute_function_call(
+            context, self.FUNCTIONS, "generate_sub_answer", self.ERROR_PAYLOAD)
 
         logger.info(f"生成sub answer:")
-        logger.info(result["arguments"].get("answer", ""))
-        # 返回子答案
-        return result["arguments"]
+        logger.info(result.get("answer", ""))
+        return result
 
-    def build_prompt(self, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def execute_batch(self, contexts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        在单次LLM调用中为一批子任务生成回答。
+
+        对共享上下文的小规模扇出，把N次独立调用融合为一次函数调用
+        （模型一次性填充所有回答槽位），省去N-1次HTTP往返的TLS与
+        排队开销。融合结果缺失或解析失败时，按任务回退到逐个执行。
+
+        Args:
+            contexts: 上下文列表，每项与execute的context格式相同
+
+        Returns:
+            与contexts顺序一致的子答案字典列表
+        """
+        if len(contexts) <= 1:
+            return [await self.execute(context) for context in contexts]
+
+        logger.info(f"===SubAnswerAgent(batch: {len(contexts)})===")
+        task_ids = [context.get("task", {}).get("id", f"task_{i + 1}")
+                    for i, context in enumerate(contexts)]
+
+        # 构建覆盖所有子任务的融合提示
+        formatted_date = date.today().isoformat()
+        prompt_parts = [f"now date:{formatted_date}\n我需要基于各自的搜索结果，为以下{len(contexts)}个研究子任务分别生成回答:\n\n"]
+        for task_id, context in zip(task_ids, contexts):
+            task = context.get("task", {})
+            prompt_parts.append(f"# 子任务 {task_id}\n")
+            prompt_parts.append(f"## 任务标题\n{task.get('title', '')}\n\n")
+            prompt_parts.append(f"## 任务描述\n{task.get('description', '')}\n\n")
+            prompt_parts.append(self._format_search_results(context.get("search_results", {})))
+            prompt_parts.append("\n")
+        prompt_parts.append("\n\n请为上述每个子任务分别生成综合回答，并通过task_id与任务对应。")
+
+        messages = [ChatMessage("system", self._get_system_prompt()),
+                    ChatMessage("user", "".join(prompt_parts))]
+
+        result = await self.llm.generate_with_function_calling_async(messages, self.BATCH_FUNCTIONS)
+
+        answers_by_id = {}
+        if result.get("name") == "generate_sub_answers":
+            for item in result.get("arguments", {}).get("answers", []):
+                if isinstance(item, dict) and item.get("task_id") is not None:
+                    answers_by_id[item["task_id"]] = {"answer": item.get("answer", "")}
+        else:
+            logger.error("LLM未返回批量子答案函数调用，回退到逐任务执行")
+
+        # 融合结果中缺失的任务并发回退到单任务路径
+        missing = [(i, context) for i, context in enumerate(contexts)
+                   if task_ids[i] not in answers_by_id]
+        if missing:
+            logger.warning(f"批量回答缺失{len(missing)}个任务，逐个补齐")
+            fallback = await asyncio.gather(*(self.execute(context) for _, context in missing))
+            for (i, _), answer in zip(missing, fallback):
+                answers_by_id[task_ids[i]] = answer
+
+        return [answers_by_id[task_id] for task_id in task_ids]
+
+    async def build_prompt(self, context: Dict[str, Any]) -> List[ChatMessage]:
         """
         构建LLM提示。
 
@@ -96,8 +201,7 @@ class SubAnswerAgent(Agent):
         messages = []
 
         # 系统提示
-        system_prompt = self._get_system_prompt()
-        messages.append({"role": "system", "content": system_prompt})
+        messages.append(ChatMessage("system", self._get_system_prompt()))
 
         # 构建用户提示
         task = context.get("task", {})
@@ -105,16 +209,20 @@ class SubAnswerAgent(Agent):
         task_description = task.get("description", "")
         search_results = context.get("search_results", {})
 
-        user_prompt = f"我需要基于以下搜索结果，为研究子任务生成回答:\n\n"
-        user_prompt += f"## 任务标题\n{task_title}\n\n"
-        user_prompt += f"## 任务描述\n{task_description}\n\n"
+        # 日期属于动态内容，放入用户消息以保持系统提示前缀稳定；
+        # date.today().isoformat()跳过时间字段且使用固定格式，比strftime更快
+        formatted_date = date.today().isoformat()
+        # 用列表收集片段，最后一次join，避免重复字符串拼接的二次开销
+        prompt_parts = [f"now date:{formatted_date}\n我需要基于以下搜索结果，为研究子任务生成回答:\n\n"]
+        prompt_parts.append(f"## 任务标题\n{task_title}\n\n")
+        prompt_parts.append(f"## 任务描述\n{task_description}\n\n")
 
         # 格式化搜索结果
-        user_prompt += self._format_search_results(search_results)
+        prompt_parts.append(self._format_search_results(search_results))
 
-        user_prompt += "\n\n请基于上述搜索结果，生成对该子任务的综合回答。"
+        prompt_parts.append("\n\n请基于上述搜索结果，生成对该子任务的综合回答。")
 
-        messages.append({"role": "user", "content": user_prompt})
+        messages.append(ChatMessage("user", "".join(prompt_parts)))
 
         return messages
 
@@ -125,22 +233,7 @@ class SubAnswerAgent(Agent):
         Returns:
             系统提示字符串
         """
-        formatted_date = datetime.now().strftime("%Y-%m-%d")
-        return f"""now date:{formatted_date}\n你是一位资深研究分析师，擅长从搜索结果中提取和综合信息，生成对特定问题的深入回答。
-
-你的职责是：
-1. 分析提供的搜索结果
-2. 提取与子任务相关的关键信息
-3. 综合这些信息生成连贯、全面的回答
-
-分析原则：
-- 保持客观，以事实和证据为基础
-- 整合多个来源的信息，寻找共识和分歧
-- 适当引用信息来源，确保可追溯性
-- 区分确定的事实和推测的内容
-- 注意信息的时效性和相关性
-
-你应该提供一个综合性的回答，直接针对子任务。你的回答应该全面但简洁，涵盖搜索结果中的主要信息。"""
+        return self.SYSTEM_PROMPT
 
     def _format_search_results(self, search_results: Dict[str, Any]) -> str:
         """
@@ -152,36 +245,34 @@ class SubAnswerAgent(Agent):
         Returns:
             格式化的搜索结果文本
         """
-        formatted_text = "## 搜索结果\n\n"
-
         results = search_results.get("results", [])
         if not results:
-            return formatted_text + "没有提供搜索结果。"
+            return "## 搜索结果\n\n没有提供搜索结果。"
 
+        # 用列表收集片段，最后一次join，避免O(n^2)的字符串拼接
+        parts = ["## 搜索结果\n\n"]
         for i, result in enumerate(results):
-            formatted_text += f"### 结果 {i + 1}\n"
+            parts.append(_RESULT_HEADER(index=i + 1))
 
             # 添加标题（如果有）
             if "title" in result:
-                formatted_text += f"**标题**: {result['title']}\n\n"
+                parts.append(_RESULT_TITLE(title=result['title']))
 
             # 添加网址（如果有）
             if "url" in result:
-                formatted_text += f"**来源**: {result['url']}\n\n"
-
-            # 添加内容（如果有）
-            if "content" in result:
-                content = result["content"]
-                # 如果内容太长，截断它
-                if len(content) > 200:
-                    content = content[:200] + "...(内容已截断)"
-                formatted_text += f"**内容**:\n{content}\n\n"
+                parts.append(_RESULT_URL(url=result['url']))
+
+            # 添加内容（如果有），过长时单次切片截断
+            content = result.get("content")
+            if content is not None:
+                content = (content[:200] + _TRUNC_SUFFIX) if len(content) > 200 else content
+                parts.append(_RESULT_CONTENT(content=content))
             if "snippet" in result:
-                formatted_text += f"**摘要**:\n{result['snippet']}\n\n"
+                parts.append(_RESULT_SNIPPET(snippet=result['snippet']))
 
-            formatted_text += "---\n\n"
+            parts.append("---\n\n")
 
-        return formatted_text
+        return "".join(parts)
 
     def parse_response(self, response: str) -> Dict[str, Any]:
         """
@@ -196,10 +287,10 @@ class SubAnswerAgent(Agent):
         # 由于使用function calling，此方法在当前实现中不会被调用
         # 保留此方法以符合Agent抽象基类要求
         try:
-            parsed = json.loads(response)
+            parsed = json_utils.loads(response)
             return parsed
-        except:
-            logging.error(f"解析子答案响应失败: {response}")
+        except (ValueError, TypeError) as e:
+            logger.error("解析子答案响应失败: %s; 响应: %.200s", e, response)
             return {
                 "error": "解析响应失败",
                 "answer": ""
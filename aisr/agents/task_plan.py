@@ -6,16 +6,22 @@
 """
 
 import logging
+import string
 from datetime import datetime
 from typing import Dict, Any, List
-import json
-import re
 
-from aisr.agents.base import Agent
-from aisr.utils import logging_utils
+from aisr.agents.base import AsyncAgent, SUB_ANSWER_MAX_CHARS, truncate_text
+from aisr.core.llm_provider import ChatMessage
+from aisr.utils import json_utils, logging_utils
 logger = logging_utils.get_logger(__name__, color="green")
 
-class TaskPlanAgent(Agent):
+# ID生成的标点删除表：str.translate在C层单遍完成字符删除，
+# 比正则引擎快数倍。覆盖ASCII标点与标题中常见的中文标点，
+# 中日韩文字本身保留（与原先\w语义一致）。
+_PUNCT_TABLE = str.maketrans(
+    '', '', string.punctuation + "，。、；：？！（）《》【】「」『』…—·～‘’“”")
+
+class TaskPlanAgent(AsyncAgent):
     """
     任务规划代理，负责将研究查询分解为子任务列表。
 
@@ -27,7 +33,61 @@ class TaskPlanAgent(Agent):
     - 结构化的子任务列表
     """
 
-    def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
+    # 函数调用模式在类加载时定义一次，避免每次调用重新分配dict字面量
+    FUNCTIONS = [{
+        "name": "task_planning",
+        "description": "规划研究任务并分解为子任务列表",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "sub_tasks": {
+                    "type": "array",
+                    "description": "子任务列表，按执行顺序排列",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "title": {"type": "string", "description": "任务简短标题"},
+                            "description": {"type": "string", "description": "任务详细描述"}
+                        },
+                        "required": ["title", "description"]
+                    }
+                },
+                "reasoning": {
+                    "type": "string",
+                    "description": "任务分解的推理过程"
+                }
+            },
+            "required": ["sub_tasks", "reasoning"]
+        }
+    }]
+
+    # 系统提示正文为静态文本，日期前缀在_get_system_prompt中按日拼接
+    SYSTEM_PROMPT_BODY = """你是一位资深研究规划专家，擅长将复杂查询分解为结构化的研究子任务。
+
+你的职责是：
+1. 分析用户的研究查询
+2. 将查询分解为清晰、可执行的子任务
+3. 按照合理的执行顺序排列子任务
+4. 考虑任务间的依赖关系
+
+规划思路：
+- 确保子任务覆盖查询的所有关键方面
+- 子任务应具体明确，便于搜索和研究
+- 适当考虑任务的粒度，既不要过于宽泛也不要过于细碎
+- 重要且基础的任务应放在前面
+- 考虑渐进式研究策略，从基础信息到深入分析
+- 如果用户提供了前序计划和洞察，应充分利用这些信息进行调整
+- 对于之前子回答中提到的关键实体，可以进行深入研究，形成一系列子任务，从而避免子任务空洞且泛泛
+
+请注意：
+- 子任务数量应根据查询复杂度自行判断，一般为1-3个
+- 每个子任务必须包含标题和详细描述，标题应当准确概括该任务的目标，包含所有必要实体
+- 提供详细的推理过程，解释你的任务分解逻辑
+- 子任务应当是针对研究阶段的，如果是根据已有研究结果进行总结、计算等阶段，不属于研究子任务
+
+你的输出将直接用于指导自动化研究系统执行查询，因此请保持清晰和结构化。"""
+
+    async def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """
         执行任务规划，将查询分解为子任务列表。
 
@@ -48,51 +108,26 @@ class TaskPlanAgent(Agent):
             raise ValueError("任务规划必须提供查询")
 
         # 构建提示
-        prompt = self.build_prompt(context)
+        prompt = await self.build_prompt(context)
 
         # 调用LLM生成任务规划
-        functions = [{
-            "name": "task_planning",
-            "description": "规划研究任务并分解为子任务列表",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "sub_tasks": {
-                        "type": "array",
-                        "description": "子任务列表，按执行顺序排列",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "title": {"type": "string", "description": "任务简短标题"},
-                                "description": {"type": "string", "description": "任务详细描述"}
-                            },
-                            "required": ["title", "description"]
-                        }
-                    },
-                    "reasoning": {
-                        "type": "string",
-                        "description": "任务分解的推理过程"
-                    }
-                },
-                "required": ["sub_tasks", "reasoning"]
-            }
-        }]
-
-        result = self.llm.generate_with_function_calling(prompt, functions)
+        result = await self.llm.generate_with_function_calling_async(prompt, self.FUNCTIONS)
 
         if "name" not in result or result["name"] != "task_planning":
             # 处理LLM未返回预期函数调用的情况
-            logging.error("LLM未返回任务规划函数调用")
+            logger.error("LLM未返回任务规划函数调用")
             error_response = {
                 "error": "生成任务规划失败",
                 "sub_tasks": []
             }
             return error_response
 
-        logger.info(f"生成sub_tasks:")
-        logger.info(result["arguments"].get("sub_tasks", ""))
-        logger.info(f"生成reasoning:")
-        logger.info(result["arguments"].get("reasoning", ""))
+        # 结果内容可能很长，先判断日志级别再格式化，避免无效开销
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("生成sub_tasks:")
+            logger.info(result["arguments"].get("sub_tasks", ""))
+            logger.info("生成reasoning:")
+            logger.info(result["arguments"].get("reasoning", ""))
         # 解析任务规划结果
         plan_result = result["arguments"]
         # 为每个子任务添加ID
@@ -130,18 +165,16 @@ class TaskPlanAgent(Agent):
         Returns:
             生成的ID
         """
-        # 移除标点符号，转换为小写，替换空格为下划线
-        clean_title = re.sub(r'[^\w\s]', '', title.lower())
-        clean_title = re.sub(r'\s+', '_', clean_title)
+        # 移除标点符号，转换为小写；split+join单遍完成空白归一化
+        clean_title = title.lower().translate(_PUNCT_TABLE)
 
         # 取前3个词（最多）
-        words = clean_title.split('_')
-        short_title = '_'.join(words[:3])
+        short_title = '_'.join(clean_title.split()[:3])
 
         # 添加索引确保唯一性
         return f"task_{index}_{short_title}"
 
-    def build_prompt(self, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def build_prompt(self, context: Dict[str, Any]) -> List[ChatMessage]:
         """
         构建LLM提示。
 
@@ -151,11 +184,8 @@ class TaskPlanAgent(Agent):
         Returns:
             LLM提示消息列表
         """
-        messages = []
-
-        # 系统提示
-        system_prompt = self._get_system_prompt()
-        messages.append({"role": "system", "content": system_prompt})
+        # 系统提示消息按日缓存，多次调用复用同一对象
+        messages = [self._get_system_message()]
 
         # 用户查询
         query = context.get("query", "")
@@ -166,42 +196,42 @@ class TaskPlanAgent(Agent):
         if history_context:
             user_prompt += history_context
 
-        messages.append({"role": "user", "content": user_prompt})
+        messages.append(ChatMessage("user", user_prompt))
 
         return messages
 
+    # (日期, 组装后的系统提示, 系统消息对象)缓存，内容每天才变化一次
+    _cached_prompt = None
+
     def _get_system_prompt(self) -> str:
         """
         获取系统提示。
 
+        提示正文是静态文本，只有日期前缀每天变化，因此按日期缓存
+        组装结果，同一天内的重复调用直接返回已构建的字符串。
+
         Returns:
             系统提示字符串
         """
         formatted_date = datetime.now().strftime("%Y-%m-%d")
-        return f"""now date:{formatted_date}\n你是一位资深研究规划专家，擅长将复杂查询分解为结构化的研究子任务。
+        if self._cached_prompt is None or self._cached_prompt[0] != formatted_date:
+            prompt = f"now date:{formatted_date}\n{self.SYSTEM_PROMPT_BODY}"
+            self._cached_prompt = (formatted_date, prompt,
+                                   ChatMessage("system", prompt))
+        return self._cached_prompt[1]
 
-你的职责是：
-1. 分析用户的研究查询
-2. 将查询分解为清晰、可执行的子任务
-3. 按照合理的执行顺序排列子任务
-4. 考虑任务间的依赖关系
-
-规划思路：
-- 确保子任务覆盖查询的所有关键方面
-- 子任务应具体明确，便于搜索和研究
-- 适当考虑任务的粒度，既不要过于宽泛也不要过于细碎
-- 重要且基础的任务应放在前面
-- 考虑渐进式研究策略，从基础信息到深入分析
-- 如果用户提供了前序计划和洞察，应充分利用这些信息进行调整
-- 对于之前子回答中提到的关键实体，可以进行深入研究，形成一系列子任务，从而避免子任务空洞且泛泛
+    def _get_system_message(self) -> ChatMessage:
+        """
+        获取预构建的系统提示消息。
 
-请注意：
-- 子任务数量应根据查询复杂度自行判断，一般为1-3个
-- 每个子任务必须包含标题和详细描述，标题应当准确概括该任务的目标，包含所有必要实体
-- 提供详细的推理过程，解释你的任务分解逻辑
-- 子任务应当是针对研究阶段的，如果是根据已有研究结果进行总结、计算等阶段，不属于研究子任务
+        消息对象与系统提示字符串共用同一按日缓存，build_prompt
+        每次调用只付出属性读取的成本，无需重建消息。
 
-你的输出将直接用于指导自动化研究系统执行查询，因此请保持清晰和结构化。"""
+        Returns:
+            系统提示的ChatMessage对象
+        """
+        self._get_system_prompt()
+        return self._cached_prompt[2]
 
     def _format_history_context(self, context: Dict[str, Any]) -> str:
         """
@@ -213,8 +243,6 @@ class TaskPlanAgent(Agent):
         Returns:
             格式化的历史上下文字符串，如果没有历史信息则返回空字符串
         """
-        history_text = ""
-
         # 检查是否有历史信息
         has_history = (
                 context.get("previous_plans") or
@@ -226,47 +254,49 @@ class TaskPlanAgent(Agent):
         if not has_history:
             return ""
 
-        history_text = "\n\n## 历史研究信息\n"
+        # 用列表收集片段，最后一次join，避免O(n^2)的字符串拼接
+        history_parts = ["\n\n## 历史研究信息\n"]
 
         # 添加前序计划摘要
         previous_plans = context.get("previous_plans", [])
         if previous_plans:
-            history_text += "\n### 前序研究计划\n"
+            history_parts.append("\n### 前序研究计划\n")
             for i, plan in enumerate(previous_plans):
-                history_text += f"\n计划 {i + 1}:\n"
+                history_parts.append(f"\n计划 {i + 1}:\n")
 
                 tasks = plan.get("sub_tasks", [])
                 if tasks:
                     for task in tasks:
-                        history_text += f"- {task.get('title')}\n"
+                        history_parts.append(f"- {task.get('title')}\n")
 
         # 添加已完成任务的子答案
         previous_sub_answers = context.get("previous_sub_answers", {})
         if previous_sub_answers:
-            history_text += "\n### 已完成任务的子答案\n"
+            history_parts.append("\n### 已完成任务的子答案\n")
             for task_id, sub_answer in previous_sub_answers.items():
-                history_text += f"\n任务: {task_id}\n"
-                # 直接使用子答案作为文本，不假设特定的结构
-                history_text += f"结果: {str(sub_answer)[:300]}...\n"
+                history_parts.append(f"\n任务: {task_id}\n")
+                # 只截取有界前缀，避免为前300字符物化整个子答案的repr
+                history_parts.append(f"结果: {truncate_text(sub_answer, 300)}...\n")
 
         # 添加未执行计划
         unexecuted_plan = context.get("unexecuted_plan")
         if unexecuted_plan:
-            history_text += "\n### 上轮未执行的计划\n"
+            history_parts.append("\n### 上轮未执行的计划\n")
             tasks = unexecuted_plan.get("sub_tasks", [])
             for task in tasks:
-                history_text += f"- {task.get('title')}: {task.get('description')}\n"
+                history_parts.append(f"- {task.get('title')}: {task.get('description')}\n")
 
         # 添加洞察（不假设特定结构）
         plan_insights = context.get("plan_insights")
         if plan_insights:
-            history_text += "\n### 对计划的洞察\n"
-            # 直接使用洞察作为文本，不假设特定的结构
-            history_text += str(plan_insights)
+            history_parts.append("\n### 对计划的洞察\n")
+            # 洞察同样有界截断，防止超长洞察无限放大提示
+            history_parts.append(truncate_text(plan_insights, SUB_ANSWER_MAX_CHARS,
+                                               suffix="...(内容已截断)"))
 
-        history_text += "\n\n请基于上述历史信息和当前查询，优化研究计划。如有需要，可以保留之前计划中合理的部分，并添加新的任务以弥补知识缺口。\n"
+        history_parts.append("\n\n请基于上述历史信息和当前查询，优化研究计划。如有需要，可以保留之前计划中合理的部分，并添加新的任务以弥补知识缺口。\n")
 
-        return history_text
+        return "".join(history_parts)
 
     def parse_response(self, response: str) -> Dict[str, Any]:
         """
@@ -281,10 +311,10 @@ class TaskPlanAgent(Agent):
         # 由于使用function calling，此方法在当前实现中不会被调用
         # 保留此方法以符合Agent抽象基类要求
         try:
-            parsed = json.loads(response)
+            parsed = json_utils.loads(response)
             return parsed
-        except:
-            logging.error(f"解析任务规划响应失败: {response}")
+        except (ValueError, TypeError) as e:
+            logger.error("解析任务规划响应失败: %s; 响应: %.200s", e, response)
             return {
                 "error": "解析响应失败",
                 "sub_tasks": []
@@ -2,27 +2,402 @@
 LLM提供者模块，负责与LLM服务提供商集成。
 """
 
+import asyncio
+import copy
+import hashlib
+import importlib.util
+import itertools
 import json
 import os
-from typing import Dict, Any, List, Optional, Union
+import random
+import sys
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Callable, Dict, Any, List, Optional, Union
 from aisr.utils.config import config
 
-# 可选导入，根据用户配置决定
-try:
-    import anthropic
-    ANTHROPIC_AVAILABLE = True
-except ImportError:
-    ANTHROPIC_AVAILABLE = False
+# 提供商SDK延迟到首次构建客户端时才导入：anthropic/openai连带
+# httpx、pydantic等依赖的冷启动导入要100-500ms，不触碰LLM的
+# 代码路径（如generate_summary等CLI工具）不应付这笔开销。
+# 可用性探测用find_spec，只查找不加载。
+def _has_sdk(name: str) -> bool:
+    """检查SDK包是否已安装（不触发实际导入）。"""
+    return importlib.util.find_spec(name) is not None
 
+# numpy为可选依赖，仅语义缓存需要；未安装时语义缓存自动禁用
 try:
-    import openai
-    OPENAI_AVAILABLE = True
+    import numpy as np
 except ImportError:
-    OPENAI_AVAILABLE = False
+    np = None
 
-from aisr.utils import logging_utils
+from aisr.utils import json_utils, logging_utils
 logger = logging_utils.get_logger(__name__, color="red")
 
+# 异步LLM调用的全局并发上限：无界的asyncio.gather会撞上提供商的
+# RPM/TPM限流导致429重试，整体反而更慢。可通过环境变量或配置调整。
+_LLM_SEMAPHORE = asyncio.Semaphore(
+    int(os.getenv("AISR_LLM_CONCURRENCY",
+                  config.get("runtime_parameters").get("max_concurrent_llm_calls", 8))))
+
+# 进程内LRU响应缓存：重规划循环中经常出现完全相同的提示，
+# 命中时以微秒级返回，省去整次网络往返和API费用。
+# 可通过runtime_parameters.llm_response_cache关闭。
+_RESPONSE_CACHE_ENABLED = config.get("runtime_parameters").get("llm_response_cache", True)
+_RESPONSE_CACHE_SIZE = int(os.getenv("AISR_LLM_CACHE_SIZE", "128"))
+_RESPONSE_CACHE: "OrderedDict[str, Any]" = OrderedDict()
+_RESPONSE_CACHE_LOCK = threading.Lock()
+_RESPONSE_CACHE_STATS = {"hits": 0, "misses": 0}
+
+# 磁盘响应缓存：内存LRU随进程重启丢失，提示调优的开发循环每次都要
+# 重付全部LLM延迟。SQLite持久层让重复提示跨运行以毫秒级命中。
+# 默认关闭，可通过runtime_parameters.llm_disk_cache开启。
+_DISK_CACHE_ENABLED = config.get("runtime_parameters").get("llm_disk_cache", False)
+_DISK_CACHE_DIR = os.getenv("AISR_LLM_CACHE_DIR", ".aisr-llm-cache")
+_DISK_CACHE_TTL = int(config.get("runtime_parameters").get("llm_disk_cache_ttl", 7 * 24 * 3600))
+
+# 默认模型注册表：配置在进程生命周期内不变，导入时读取一次，
+# 每次__init__只剩一次属性读取；只读视图防止调用方意外改写全局默认
+_DEFAULT_MODELS = MappingProxyType(dict(config.get("default_models") or {}))
+
+# 工具格式转换缓存：{(id(functions), 目标格式): (原列表强引用, 转换结果)}
+_TOOL_FORMAT_CACHE: Dict[tuple, tuple] = {}
+
+# 瞬时故障重试：单次429/5xx/连接抖动若直接抛出，整个智能体图
+# 都要重跑，已付费的前序LLM调用全部作废。对已知可重试的错误
+# 做指数退避重试，把O(N)的重执行代价降为O(1)。
+_RETRY_ATTEMPTS = int(config.get("runtime_parameters").get("llm_retry_attempts", 4))
+_RETRY_BASE_DELAY = 1.0
+_RETRY_MAX_DELAY = 16.0
+
+
+def _collect_retryable_exceptions() -> tuple:
+    """从已加载的SDK模块收集标识瞬时故障的异常类型。"""
+    exceptions = []
+    for module in (sys.modules.get("anthropic"), sys.modules.get("openai")):
+        if module is None:
+            continue
+        for name in ("RateLimitError", "APIConnectionError", "APITimeoutError", "InternalServerError"):
+            exc = getattr(module, name, None)
+            if exc is not None:
+                exceptions.append(exc)
+    return tuple(exceptions)
+
+
+# SDK为延迟导入，异常集合在首次客户端初始化后由
+# _refresh_retryable_exceptions填充；空元组时except子句不捕获任何异常
+_RETRYABLE_EXCEPTIONS: tuple = ()
+
+
+def _refresh_retryable_exceptions() -> None:
+    """SDK导入后刷新可重试异常集合。"""
+    global _RETRYABLE_EXCEPTIONS
+    _RETRYABLE_EXCEPTIONS = _collect_retryable_exceptions()
+
+
+def _retry_delay(exc, attempt: int) -> float:
+    """
+    计算下次重试前的等待时间。
+
+    429响应若携带Retry-After头则优先遵循（提供商明确告知了限流
+    窗口，盲目指数退避要么等太久要么再次撞限）；否则按指数退避。
+    两种情况都叠加0-1秒随机抖动，避免并发调用方同步重试形成
+    重试风暴。
+
+    Args:
+        exc: 捕获的可重试异常
+        attempt: 当前尝试序号（从1开始）
+
+    Returns:
+        等待秒数
+    """
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        raw = headers.get("retry-after")
+        if raw:
+            try:
+                return min(float(raw), _RETRY_MAX_DELAY) + random.random()
+            except (TypeError, ValueError):
+                pass
+    delay = min(_RETRY_BASE_DELAY * (2 ** (attempt - 1)), _RETRY_MAX_DELAY)
+    return delay + random.random()
+
+
+def _call_with_retry(call):
+    """
+    执行API调用，对可重试错误做指数退避重试。
+
+    重试复用同一客户端实例，HTTP连接池保持温热，不必为每次
+    重试重付TLS握手。
+
+    Args:
+        call: 发起一次API请求的零参调用
+
+    Returns:
+        API响应
+    """
+    for attempt in range(1, _RETRY_ATTEMPTS + 1):
+        try:
+            return call()
+        except _RETRYABLE_EXCEPTIONS as e:
+            if attempt == _RETRY_ATTEMPTS:
+                raise
+            delay = _retry_delay(e, attempt)
+            logger.warning("LLM调用失败(%s)，%.1f秒后重试 (%d/%d)",
+                           type(e).__name__, delay, attempt, _RETRY_ATTEMPTS)
+            time.sleep(delay)
+
+
+async def _call_with_retry_async(call):
+    """
+    异步版本的重试执行，退避等待使用asyncio.sleep以免阻塞事件循环。
+
+    Args:
+        call: 发起一次API请求并返回可等待对象的零参调用
+
+    Returns:
+        API响应
+    """
+    for attempt in range(1, _RETRY_ATTEMPTS + 1):
+        try:
+            return await call()
+        except _RETRYABLE_EXCEPTIONS as e:
+            if attempt == _RETRY_ATTEMPTS:
+                raise
+            delay = _retry_delay(e, attempt)
+            logger.warning("LLM调用失败(%s)，%.1f秒后重试 (%d/%d)",
+                           type(e).__name__, delay, attempt, _RETRY_ATTEMPTS)
+            await asyncio.sleep(delay)
+
+
+# 语义缓存：默认关闭，可通过runtime_parameters.llm_semantic_cache开启
+_SEMANTIC_CACHE_ENABLED = config.get("runtime_parameters").get("llm_semantic_cache", False)
+_SEMANTIC_CACHE_THRESHOLD = config.get("runtime_parameters").get("llm_semantic_cache_threshold", 0.92)
+_SEMANTIC_CACHE_SIZE = int(config.get("runtime_parameters").get("llm_semantic_cache_size", 256))
+_EMBEDDING_MODEL = "text-embedding-3-small"
+
+
+class SemanticCache:
+    """
+    基于嵌入相似度的响应缓存。
+
+    智能体提示经常只在措辞或空白上有差异（改写、重试时的微调），
+    精确匹配缓存对此无能为力。语义缓存将提示嵌入为归一化向量，
+    查询时用一次BLAS矩阵-向量乘得到与全部已存条目的余弦相似度，
+    超过阈值即复用已缓存的响应——一次嵌入调用的代价远小于一次
+    完整生成。
+    """
+
+    def __init__(self, embed_fn: Callable[[str], Any], threshold: float = _SEMANTIC_CACHE_THRESHOLD,
+                 max_entries: int = _SEMANTIC_CACHE_SIZE):
+        """
+        初始化语义缓存。
+
+        Args:
+            embed_fn: 文本嵌入函数，返回一维向量；失败时应返回None
+            threshold: 余弦相似度命中阈值
+            max_entries: 最大条目数，超出时淘汰最旧条目
+        """
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._embeddings = None  # (N, D)归一化嵌入矩阵
+        self._responses: List[Any] = []
+
+    @staticmethod
+    def _normalize(vector):
+        """归一化嵌入向量，零向量原样返回。"""
+        arr = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(arr)
+        return arr / norm if norm else arr
+
+    def get(self, text: str):
+        """
+        按语义相似度查询缓存。
+
+        Args:
+            text: 查询文本
+
+        Returns:
+            相似度超过阈值的缓存响应，未命中时返回None
+        """
+        embedding = self.embed_fn(text)
+        if embedding is None:
+            return None
+        query = self._normalize(embedding)
+        with self._lock:
+            if self._embeddings is None or not len(self._responses):
+                return None
+            sims = self._embeddings @ query
+            best = int(np.argmax(sims))
+            if sims[best] >= self.threshold:
+                logger.info("命中语义缓存 (相似度 %.3f)", float(sims[best]))
+                return copy.deepcopy(self._responses[best])
+        return None
+
+    def put(self, text: str, response: Any) -> None:
+        """
+        写入缓存条目，超出容量时淘汰最旧条目。
+
+        Args:
+            text: 提示文本
+            response: 对应的LLM响应
+        """
+        embedding = self.embed_fn(text)
+        if embedding is None:
+            return
+        row = self._normalize(embedding)[None, :]
+        with self._lock:
+            if self._embeddings is None:
+                self._embeddings = row
+            else:
+                self._embeddings = np.vstack([self._embeddings, row])
+            self._responses.append(copy.deepcopy(response))
+            if len(self._responses) > self.max_entries:
+                self._embeddings = self._embeddings[1:]
+                self._responses.pop(0)
+
+
+class _SQLiteCache:
+    """
+    基于SQLite的键值缓存，为LLM响应提供跨进程的持久化存储。
+
+    值以JSON序列化（响应缓存只存放文本或函数调用结果字典，均可
+    安全序列化）；条目带过期时间戳，读取时惰性清理过期数据。
+    """
+
+    def __init__(self, cache_dir: str, ttl: int):
+        """
+        初始化磁盘缓存。
+
+        Args:
+            cache_dir: 缓存目录，不存在时自动创建
+            ttl: 条目过期时间（秒）
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(cache_dir, "responses.sqlite3"), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, expires_at REAL)")
+        self._conn.commit()
+
+    def get(self, key: str):
+        """读取缓存值，未命中或已过期时返回None。"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at < time.time():
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+        return json_utils.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        """写入缓存值并刷新过期时间。"""
+        serialized = json_utils.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, serialized, time.time() + self.ttl))
+            self._conn.commit()
+
+
+def _response_cache_get(key: str, disk_cache: Optional[_SQLiteCache] = None):
+    """线程安全地读取响应缓存，命中时刷新LRU顺序并返回深拷贝。
+
+    内存LRU未命中时回落到磁盘缓存（如启用），磁盘命中的条目
+    会回填到内存层，后续访问无需再触达SQLite。
+    """
+    if not _RESPONSE_CACHE_ENABLED:
+        return None
+    with _RESPONSE_CACHE_LOCK:
+        if key in _RESPONSE_CACHE:
+            _RESPONSE_CACHE.move_to_end(key)
+            value = _RESPONSE_CACHE[key]
+            _RESPONSE_CACHE_STATS["hits"] += 1
+            # 深拷贝防止调用方就地修改缓存条目
+            return copy.deepcopy(value)
+    if disk_cache is not None:
+        value = disk_cache.get(key)
+        if value is not None:
+            with _RESPONSE_CACHE_LOCK:
+                _RESPONSE_CACHE[key] = copy.deepcopy(value)
+                _RESPONSE_CACHE.move_to_end(key)
+                _RESPONSE_CACHE_STATS["hits"] += 1
+            return value
+    with _RESPONSE_CACHE_LOCK:
+        _RESPONSE_CACHE_STATS["misses"] += 1
+    return None
+
+
+def response_cache_stats() -> Dict[str, int]:
+    """返回响应缓存的累计命中/未命中计数快照。"""
+    with _RESPONSE_CACHE_LOCK:
+        return dict(_RESPONSE_CACHE_STATS)
+
+
+def _response_cache_put(key: str, value: Any, disk_cache: Optional[_SQLiteCache] = None) -> None:
+    """线程安全地写入响应缓存，超出容量时淘汰最久未用的条目。"""
+    if not _RESPONSE_CACHE_ENABLED:
+        return
+    with _RESPONSE_CACHE_LOCK:
+        _RESPONSE_CACHE[key] = copy.deepcopy(value)
+        _RESPONSE_CACHE.move_to_end(key)
+        while len(_RESPONSE_CACHE) > _RESPONSE_CACHE_SIZE:
+            _RESPONSE_CACHE.popitem(last=False)
+    if disk_cache is not None:
+        disk_cache.set(key, value)
+
+
+@dataclass(slots=True)
+class ChatMessage:
+    """
+    单条对话消息。
+
+    槽位化的轻量消息对象，代替每次提示构建时分配的
+    {"role": ..., "content": ...}字典，对象开销约为dict的一半；
+    发送给提供者SDK前由_prepare_messages统一转换为dict格式。
+    """
+    role: str
+    content: str
+
+    def to_dict(self) -> Dict[str, str]:
+        """转换为提供者SDK期望的dict格式。"""
+        return {"role": self.role, "content": self.content}
+
+
+# 合法消息角色；frozenset成员测试比列表线性扫描更快
+_VALID_ROLES = frozenset({"user", "assistant", "system"})
+
+
+class _ValidatedMessageList(list):
+    """
+    带已规范化前缀标记的消息列表。
+
+    Conversation的消息列表只会追加，已验证并转为dict格式的前缀
+    无需在每次LLM调用时重复处理；validated_length记录该前缀长度，
+    _prepare_messages只规范化其后的新条目，单轮成本从O(全部历史)
+    摊还为O(新增消息)。
+    """
+
+    __slots__ = ("validated_length",)
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.validated_length = 0
+
+
 class LLMProvider:
     """
     LLM服务提供者类，统一管理LLM API调用。
@@ -30,45 +405,169 @@ class LLMProvider:
     支持Anthropic Claude和OpenAI模型。
     """
 
-    def __init__(self, provider: Optional[str] = None, api_key: Optional[str] = None, model: Optional[str] = None):
+    def __init__(self, provider: Optional[str] = None, api_key: Optional[Union[str, List[str]]] = None,
+                 model: Optional[str] = None,
+                 cache_dir: Optional[str] = None, cache_ttl: Optional[int] = None,
+                 prewarm: bool = True):
         """
         初始化LLM提供者。
 
         Args:
             provider: LLM提供者名称，"anthropic"或"openai"
-            api_key: API密钥
+            api_key: API密钥，或密钥列表（多密钥时按轮转分摊每密钥限流）
             model: 模型名称
+            cache_dir: 磁盘响应缓存目录，显式传入时即启用磁盘缓存
+            cache_ttl: 磁盘缓存条目过期时间（秒）
+            prewarm: 是否在后台预热到提供商的TLS连接
         """
         self.provider = provider.lower() if provider else config.get("runtime_parameters").get("model_provider","openai")
-        self.api_key = api_key if api_key else config.get("api_keys").get(self.provider,os.environ.get("OPENAI_API_KEY"))
+        raw_keys = api_key if api_key else config.get("api_keys").get(self.provider,os.environ.get("OPENAI_API_KEY"))
+        # 兼容单密钥与密钥列表：限流按密钥计，N个密钥的聚合QPM
+        # 约为单密钥的N倍
+        self.api_keys = list(raw_keys) if isinstance(raw_keys, (list, tuple)) else [raw_keys]
+        self.api_key = self.api_keys[0]
 
         # 根据输入或默认值设置模型
-        self.model = model if model else config.get("default_models").get(self.provider,"gpt-4o-2024-08-06")
+        self.model = model if model else _DEFAULT_MODELS.get(self.provider,"gpt-4o-2024-08-06")
+
+        # 持久化响应缓存：配置开启或显式传入cache_dir时创建
+        if _DISK_CACHE_ENABLED or cache_dir is not None:
+            self._disk_cache = _SQLiteCache(cache_dir or _DISK_CACHE_DIR,
+                                            cache_ttl or _DISK_CACHE_TTL)
+        else:
+            self._disk_cache = None
 
         # 初始化客户端
         self._initialize_client()
 
+        # 后台预热：即便有keep-alive，首次调用仍要付整次TCP+TLS握手
+        # （约100-300ms）；初始化时在守护线程中发一个廉价请求
+        # 填充连接池，首个真实调用直接复用已建立的连接
+        if prewarm:
+            threading.Thread(target=self._prewarm, daemon=True).start()
+
+        # 语义缓存：需要numpy与嵌入API（当前仅OpenAI提供）
+        if _SEMANTIC_CACHE_ENABLED and np is not None and self.provider == "openai":
+            self._semantic_cache = SemanticCache(self._embed_text)
+        else:
+            self._semantic_cache = None
+
+    def _embed_text(self, text: str):
+        """
+        计算文本的嵌入向量，供语义缓存使用。
+
+        Args:
+            text: 待嵌入的文本，超长时截断到嵌入模型限制内
+
+        Returns:
+            嵌入向量，失败时返回None
+        """
+        try:
+            response = self.client.embeddings.create(
+                model=_EMBEDDING_MODEL, input=text[:8000])
+            return response.data[0].embedding
+        except Exception as e:
+            logger.warning("嵌入计算失败，跳过语义缓存: %s", e)
+            return None
+
+    def _prewarm(self):
+        """
+        预热各同步客户端的连接池。
+
+        向提供商的基地址发一个HEAD请求以完成TLS握手并把连接放入
+        keep-alive池；纯尽力而为，任何失败只记debug日志。异步端
+        使用独立的共享连接池，其首次调用自行建立连接。
+        """
+        for client in self.clients:
+            try:
+                http = getattr(client, "_client", None)
+                base_url = getattr(client, "base_url", None)
+                if http is None or base_url is None:
+                    continue
+                http.head(str(base_url))
+            except Exception as e:
+                logger.debug("连接预热失败（忽略）: %s", e)
+
+    def _build_http_client(self):
+        """
+        构建带连接池的共享异步HTTP客户端。
+
+        并发智能体的每次LLM调用若各自新建连接，要重付TCP+TLS握手
+        （每次约100-300ms）；共享连接池通过keep-alive复用连接，
+        池参数可经runtime_parameters调整。
+
+        Returns:
+            配置好的httpx.AsyncClient，httpx不可用时返回None
+        """
+        try:
+            import httpx
+        except ImportError:
+            return None
+        runtime = config.get("runtime_parameters")
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=runtime.get("http_max_connections", 200),
+                max_keepalive_connections=runtime.get("http_max_keepalive_connections", 100)),
+            timeout=runtime.get("http_timeout", 60))
+
     def _initialize_client(self):
-        """初始化LLM客户端。"""
+        """
+        初始化LLM客户端（每个API密钥各一对同步/异步客户端）。
+
+        提供商SDK在此处才实际导入，未走到LLM路径的调用方
+        （如仅做文件处理的CLI工具）不付SDK的冷启动导入开销。
+        """
         if self.provider == "anthropic":
-            if not ANTHROPIC_AVAILABLE:
+            if not _has_sdk("anthropic"):
                 raise ImportError("anthropic 库未安装。请使用 pip install anthropic 安装。")
             if not self.api_key:
                 raise ValueError("使用Anthropic需要提供API密钥")
-            self.client = anthropic.Anthropic(api_key=self.api_key)
+            import anthropic
+            http_client = self._build_http_client()
+            kwargs = {"http_client": http_client} if http_client is not None else {}
+            self.clients = [anthropic.Anthropic(api_key=key) for key in self.api_keys]
+            self.async_clients = [anthropic.AsyncAnthropic(api_key=key, **kwargs)
+                                  for key in self.api_keys]
 
         elif self.provider == "openai":
-            if not OPENAI_AVAILABLE:
+            if not _has_sdk("openai"):
                 raise ImportError("openai 库未安装。请使用 pip install openai 安装。")
             if not self.api_key:
                 raise ValueError("使用OpenAI需要提供API密钥")
 
+            import openai
             base_url=config.get("api_keys").get("openai_base_url","https://api.openai.com/v1")
-            self.client = openai.OpenAI(api_key=self.api_key,base_url=base_url)
+            http_client = self._build_http_client()
+            kwargs = {"http_client": http_client} if http_client is not None else {}
+            self.clients = [openai.OpenAI(api_key=key, base_url=base_url)
+                            for key in self.api_keys]
+            self.async_clients = [openai.AsyncOpenAI(api_key=key, base_url=base_url, **kwargs)
+                                  for key in self.api_keys]
 
         else:
             raise ValueError(f"不支持的提供者: {self.provider}。支持的提供者: anthropic, openai")
 
+        # SDK已加载，补齐重试机制识别的异常类型
+        _refresh_retryable_exceptions()
+
+        # 多密钥时轮转分发：每次客户端取用推进一步，把请求均匀摊到
+        # 各密钥上，聚合吞吐随密钥数线性扩展；单密钥时零额外开销
+        self._rr = itertools.cycle(range(len(self.clients))) if len(self.clients) > 1 else None
+
+    @property
+    def client(self):
+        """当前同步客户端，多密钥时按轮转选取。"""
+        if self._rr is None:
+            return self.clients[0]
+        return self.clients[next(self._rr)]
+
+    @property
+    def async_client(self):
+        """当前异步客户端，多密钥时按轮转选取（与同步端共享轮转游标）。"""
+        if self._rr is None:
+            return self.async_clients[0]
+        return self.async_clients[next(self._rr)]
+
     def generate(self, prompt: Union[str, List[Dict[str, Any]]], temperature: float = 0.7, max_tokens: int = config.get("runtime_parameters").get("max_tokens",8192)) -> str:
         """
         生成LLM响应。
@@ -81,32 +580,58 @@ class LLMProvider:
         Returns:
             LLM生成的文本
         """
-        logger.info(f"=== API 输入 (generate) ===")
+        logger.info("=== API 输入 (generate) ===")
         # 根据prompt类型准备消息
         messages = self._prepare_messages(prompt)
-        logger.info(f"消息:{messages}")
+        logger.debug("消息: %s", messages)
+
+        cache_key = self._response_cache_key("generate", messages, None, temperature, max_tokens)
+        cached = _response_cache_get(cache_key, self._disk_cache)
+        if cached is not None:
+            logger.info("命中LLM响应缓存 (generate)")
+            return cached
+
+        # 精确未命中时探测语义缓存：改写过的提示可复用已生成的响应
+        semantic_text = messages[-1].get("content", "") if self._semantic_cache else ""
+        if self._semantic_cache:
+            semantic_hit = self._semantic_cache.get(semantic_text)
+            if semantic_hit is not None:
+                return semantic_hit
 
         if self.provider == "anthropic":
-            response = self.client.messages.create(
+            system_blocks, chat_messages = self._split_system_messages(messages)
+            kwargs = {"system": system_blocks} if system_blocks else {}
+            response = _call_with_retry(lambda: self.client.messages.create(
                 model=self.model,
                 max_tokens=max_tokens,
                 temperature=temperature,
-                messages=messages
-            )
-            logger.info(f"=== API 输出 (generate) ===")
-            logger.info(f"原始输出内容: {response}")
-            return response.content[0].text
+                messages=chat_messages,
+                **kwargs
+            ))
+            self._log_cached_tokens(response)
+            logger.debug("=== API 输出 (generate) ===")
+            logger.debug("原始输出内容: %s", response)
+            text = response.content[0].text
+            _response_cache_put(cache_key, text, self._disk_cache)
+            if self._semantic_cache:
+                self._semantic_cache.put(semantic_text, text)
+            return text
 
         elif self.provider == "openai":
-            response = self.client.chat.completions.create(
+            response = _call_with_retry(lambda: self.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
                 temperature=temperature,
                 max_tokens=max_tokens
-            )
-            logger.info(f"=== API 输出 (generate) ===")
-            logger.info(f"原始输出内容: {response}")
-            return response.choices[0].message.content
+            ))
+            self._log_cached_tokens(response)
+            logger.debug("=== API 输出 (generate) ===")
+            logger.debug("原始输出内容: %s", response)
+            text = response.choices[0].message.content
+            _response_cache_put(cache_key, text, self._disk_cache)
+            if self._semantic_cache:
+                self._semantic_cache.put(semantic_text, text)
+            return text
 
         else:
             raise ValueError(f"无法生成: 不支持的提供者 {self.provider}")
@@ -125,31 +650,44 @@ class LLMProvider:
         Returns:
             结构化的函数调用结果
         """
-        logger.info(f"=== API 输入 (generate_with_function_calling) ===")
+        logger.info("=== API 输入 (generate_with_function_calling) ===")
         # 根据prompt类型准备消息
         messages = self._prepare_messages(prompt)
-        logger.info(f"消息:{messages}")
+        logger.debug("消息: %s", messages)
+
+        cache_key = self._response_cache_key(
+            "function_calling", messages, functions, temperature, max_tokens)
+        cached = _response_cache_get(cache_key, self._disk_cache)
+        if cached is not None:
+            logger.info("命中LLM响应缓存 (generate_with_function_calling)")
+            return cached
 
         if self.provider == "anthropic":
             # 转换为Anthropic工具格式
             tools = self._convert_to_anthropic_format(functions)
-            logger.info(f"工具:{tools}")
+            logger.debug("工具: %s", tools)
 
-            response = self.client.messages.create(
+            system_blocks, chat_messages = self._split_system_messages(messages)
+            kwargs = {"system": system_blocks} if system_blocks else {}
+            response = _call_with_retry(lambda: self.client.messages.create(
                 model=self.model,
                 max_tokens=max_tokens,
                 temperature=temperature,
-                messages=messages,
-                tools=tools
-            )
+                messages=chat_messages,
+                tools=tools,
+                **kwargs
+            ))
+            self._log_cached_tokens(response)
 
             # 提取工具使用
             for content in response.content:
                 if hasattr(content, 'type') and content.type == "tool_use":
-                    return {
+                    result = {
                         "name": content.name,
                         "arguments": content.input
                     }
+                    _response_cache_put(cache_key, result, self._disk_cache)
+                    return result
 
             # 如果没有工具使用，使用文本响应
             return {"text": response.content[0].text}
@@ -157,25 +695,28 @@ class LLMProvider:
         elif self.provider == "openai":
             # 转换为OpenAI工具格式
             tools = self._convert_to_openai_format(functions)
-            logger.info(f"工具:{tools}")
+            logger.debug("工具: %s", tools)
 
-            response = self.client.chat.completions.create(
+            response = _call_with_retry(lambda: self.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
                 tools=tools,
                 temperature=temperature,
                 max_tokens=max_tokens,
                 tool_choice="required"
-            )
-            logger.info(f"=== API 输出 (generate_with_function_calling) ===")
-            logger.info(f"原始输出内容: {response}")
+            ))
+            self._log_cached_tokens(response)
+            logger.debug("=== API 输出 (generate_with_function_calling) ===")
+            logger.debug("原始输出内容: %s", response)
 
             if response.choices[0].message.tool_calls:
                 tool_call = response.choices[0].message.tool_calls[0]
-                return {
+                result = {
                     "name": tool_call.function.name,
-                    "arguments": json.loads(tool_call.function.arguments)
+                    "arguments": json_utils.loads(tool_call.function.arguments)
                 }
+                _response_cache_put(cache_key, result, self._disk_cache)
+                return result
             else:
                 # 如果没有工具调用，使用文本响应
                 return {"text": response.choices[0].message.content}
@@ -183,6 +724,489 @@ class LLMProvider:
         else:
             raise ValueError(f"无法生成: 不支持的提供者 {self.provider}")
 
+    async def generate_async(self, prompt: Union[str, List[Dict[str, Any]]], temperature: float = 0.7,
+                             max_tokens: int = config.get("runtime_parameters").get("max_tokens",8192)) -> str:
+        """
+        异步生成LLM响应。
+
+        与generate行为一致（含响应缓存与重试），但通过异步客户端
+        执行，多个调用方可以并发await，重叠各自的网络等待。
+        缓存键与同步路径相同，两条路径互相共享命中。
+
+        Args:
+            prompt: 提示文本或消息列表
+            temperature: 温度参数，控制随机性
+            max_tokens: 最大生成的token数
+
+        Returns:
+            LLM生成的文本
+        """
+        logger.info("=== API 输入 (generate_async) ===")
+        messages = self._prepare_messages(prompt)
+        logger.debug("消息: %s", messages)
+
+        cache_key = self._response_cache_key("generate", messages, None, temperature, max_tokens)
+        cached = _response_cache_get(cache_key, self._disk_cache)
+        if cached is not None:
+            logger.info("命中LLM响应缓存 (generate_async)")
+            return cached
+
+        if self.provider == "anthropic":
+            system_blocks, chat_messages = self._split_system_messages(messages)
+            kwargs = {"system": system_blocks} if system_blocks else {}
+            async with _LLM_SEMAPHORE:
+                response = await _call_with_retry_async(lambda: self.async_client.messages.create(
+                    model=self.model,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    messages=chat_messages,
+                    **kwargs
+                ))
+            self._log_cached_tokens(response)
+            logger.debug("=== API 输出 (generate_async) ===")
+            logger.debug("原始输出内容: %s", response)
+            text = response.content[0].text
+            _response_cache_put(cache_key, text, self._disk_cache)
+            return text
+
+        elif self.provider == "openai":
+            async with _LLM_SEMAPHORE:
+                response = await _call_with_retry_async(lambda: self.async_client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                ))
+            self._log_cached_tokens(response)
+            logger.debug("=== API 输出 (generate_async) ===")
+            logger.debug("原始输出内容: %s", response)
+            text = response.choices[0].message.content
+            _response_cache_put(cache_key, text, self._disk_cache)
+            return text
+
+        else:
+            raise ValueError(f"无法生成: 不支持的提供者 {self.provider}")
+
+    async def generate_with_function_calling_async(self, prompt: Union[str, List[Dict[str, Any]]], functions: List[Dict[str, Any]],
+                                                   temperature: float = 0.2, max_tokens: int = config.get("runtime_parameters").get("max_tokens",8192)) -> Dict[str, Any]:
+        """
+        异步版本的函数调用生成，基于异步客户端执行。
+
+        多个智能体可以await本方法并发执行，重叠各自的网络等待时间。
+
+        Args:
+            prompt: 提示文本或消息列表
+            functions: 函数定义列表（统一使用简化格式，内部会根据提供者转换）
+            temperature: 温度参数
+            max_tokens: 最大生成的token数
+
+        Returns:
+            结构化的函数调用结果
+        """
+        logger.info("=== API 输入 (generate_with_function_calling_async) ===")
+        # 根据prompt类型准备消息
+        messages = self._prepare_messages(prompt)
+        logger.debug("消息: %s", messages)
+
+        # 缓存键与同步路径一致，两条路径互相共享命中
+        cache_key = self._response_cache_key(
+            "function_calling", messages, functions, temperature, max_tokens)
+        cached = _response_cache_get(cache_key, self._disk_cache)
+        if cached is not None:
+            logger.info("命中LLM响应缓存 (generate_with_function_calling_async)")
+            return cached
+
+        if self.provider == "anthropic":
+            # 转换为Anthropic工具格式
+            tools = self._convert_to_anthropic_format(functions)
+            logger.debug("工具: %s", tools)
+
+            system_blocks, chat_messages = self._split_system_messages(messages)
+            kwargs = {"system": system_blocks} if system_blocks else {}
+            async with _LLM_SEMAPHORE:
+                response = await _call_with_retry_async(lambda: self.async_client.messages.create(
+                    model=self.model,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    messages=chat_messages,
+                    tools=tools,
+                    **kwargs
+                ))
+            self._log_cached_tokens(response)
+
+            # 提取工具使用
+            for content in response.content:
+                if hasattr(content, 'type') and content.type == "tool_use":
+                    result = {
+                        "name": content.name,
+                        "arguments": content.input
+                    }
+                    _response_cache_put(cache_key, result, self._disk_cache)
+                    return result
+
+            # 如果没有工具使用，使用文本响应
+            return {"text": response.content[0].text}
+
+        elif self.provider == "openai":
+            # 转换为OpenAI工具格式
+            tools = self._convert_to_openai_format(functions)
+            logger.debug("工具: %s", tools)
+
+            async with _LLM_SEMAPHORE:
+                response = await _call_with_retry_async(lambda: self.async_client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    tools=tools,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    tool_choice="required"
+                ))
+            self._log_cached_tokens(response)
+            logger.debug("=== API 输出 (generate_with_function_calling_async) ===")
+            logger.debug("原始输出内容: %s", response)
+
+            if response.choices[0].message.tool_calls:
+                tool_call = response.choices[0].message.tool_calls[0]
+                result = {
+                    "name": tool_call.function.name,
+                    "arguments": json_utils.loads(tool_call.function.arguments)
+                }
+                _response_cache_put(cache_key, result, self._disk_cache)
+                return result
+            else:
+                # 如果没有工具调用，使用文本响应
+                return {"text": response.choices[0].message.content}
+
+        else:
+            raise ValueError(f"无法生成: 不支持的提供者 {self.provider}")
+
+    async def generate_with_function_calling_batch_async(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        并发执行一批函数调用请求，按输入顺序返回结果。
+
+        两家提供者的SDK都不支持在单次请求中返回多个独立函数调用，
+        因此批量化在客户端实现：所有请求通过asyncio.gather并发发出，
+        整批的墙钟时间约等于最慢的一次调用，而非各次调用之和。
+
+        Args:
+            requests: 请求列表，每项为包含以下键的字典
+                - prompt: 提示文本或消息列表
+                - functions: 函数定义列表
+                - temperature: 可选，温度参数
+                - max_tokens: 可选，最大生成的token数
+
+        Returns:
+            与requests顺序一致的函数调用结果列表
+        """
+        coros = [
+            self.generate_with_function_calling_async(
+                request["prompt"],
+                request["functions"],
+                **{k: request[k] for k in ("temperature", "max_tokens") if k in request}
+            )
+            for request in requests
+        ]
+        return list(await asyncio.gather(*coros))
+
+    def generate_batch(self, prompts: List[Union[str, List[Dict[str, Any]]]], temperature: float = 0.7,
+                       max_tokens: int = config.get("runtime_parameters").get("max_tokens",8192),
+                       use_batch_api: bool = False, max_concurrency: int = 20) -> List[str]:
+        """
+        为一批提示生成响应（同步入口）。
+
+        面向非交互式的批量工作（如文档摘要、片段分类）：
+        - use_batch_api=True且提供者为OpenAI时走Batch API，以分钟级
+          的排队延迟换取约50%的费用折扣；
+        - 其余情况回退到带并发上限的asyncio.gather，整批墙钟时间
+          约等于最慢的一次调用。
+
+        Args:
+            prompts: 提示列表，每项为文本或消息列表
+            temperature: 温度参数
+            max_tokens: 单条响应的最大token数
+            use_batch_api: 是否使用提供商的批处理API（延迟高但更便宜）
+            max_concurrency: 并发模式下的最大并发请求数
+
+        Returns:
+            与prompts顺序一致的响应文本列表
+        """
+        if not prompts:
+            return []
+
+        if use_batch_api:
+            if self.provider == "openai":
+                return self._generate_batch_openai(prompts, temperature, max_tokens)
+            # Anthropic SDK的消息批处理接口形态随版本变化较大，
+            # 统一回退到并发路径，行为不变只是没有批量折扣
+            logger.warning("提供者 %s 未启用Batch API路径，回退到并发执行", self.provider)
+
+        async def _run_concurrent() -> List[str]:
+            sem = asyncio.Semaphore(max_concurrency)
+
+            async def _one(prompt):
+                async with sem:
+                    return await self.generate_async(prompt, temperature, max_tokens)
+
+            return list(await asyncio.gather(*(_one(prompt) for prompt in prompts)))
+
+        return asyncio.run(_run_concurrent())
+
+    def _generate_batch_openai(self, prompts: List[Union[str, List[Dict[str, Any]]]],
+                               temperature: float, max_tokens: int) -> List[str]:
+        """
+        通过OpenAI Batch API执行批量生成。
+
+        将所有请求打包为JSONL上传，创建批处理任务后以指数退避轮询
+        状态，完成后下载输出文件并按custom_id还原输入顺序。
+
+        Args:
+            prompts: 提示列表
+            temperature: 温度参数
+            max_tokens: 单条响应的最大token数
+
+        Returns:
+            与prompts顺序一致的响应文本列表
+        """
+        lines = []
+        for i, prompt in enumerate(prompts):
+            lines.append(json.dumps({
+                "custom_id": f"request-{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.model,
+                    "messages": self._prepare_messages(prompt),
+                    "temperature": temperature,
+                    "max_tokens": max_tokens,
+                },
+            }, ensure_ascii=False))
+
+        batch_file = self.client.files.create(
+            file=("batch.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h")
+        logger.info("已提交Batch API任务 %s（%d条请求）", batch.id, len(prompts))
+
+        # 指数退避轮询：批处理以分钟计，从5秒退避到60秒上限
+        delay = 5.0
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            time.sleep(delay)
+            delay = min(delay * 2, 60.0)
+            batch = self.client.batches.retrieve(batch.id)
+
+        if batch.status != "completed":
+            raise RuntimeError(f"Batch API任务 {batch.id} 未完成: {batch.status}")
+
+        output = self.client.files.content(batch.output_file_id)
+        results: Dict[str, str] = {}
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            record = json_utils.loads(line)
+            body = (record.get("response") or {}).get("body") or {}
+            choices = body.get("choices") or []
+            if choices:
+                results[record.get("custom_id", "")] = choices[0]["message"]["content"]
+
+        missing = [i for i in range(len(prompts)) if f"request-{i}" not in results]
+        if missing:
+            raise RuntimeError(f"Batch API任务 {batch.id} 缺失{len(missing)}条结果")
+
+        return [results[f"request-{i}"] for i in range(len(prompts))]
+
+    async def generate_stream_async(self, prompt: Union[str, List[Dict[str, Any]]], temperature: float = 0.7,
+                                    max_tokens: int = config.get("runtime_parameters").get("max_tokens",8192)):
+        """
+        流式生成LLM响应，逐块产出文本。
+
+        相比等待完整响应，流式输出将可感知延迟降低到首token时间，
+        且文本增量式消费，无需整体缓冲。
+
+        Args:
+            prompt: 提示文本或消息列表
+            temperature: 温度参数
+            max_tokens: 最大生成的token数
+
+        Yields:
+            LLM生成的文本片段
+        """
+        logger.info("=== API 输入 (generate_stream_async) ===")
+        messages = self._prepare_messages(prompt)
+        logger.debug("消息: %s", messages)
+
+        if self.provider == "anthropic":
+            system_blocks, chat_messages = self._split_system_messages(messages)
+            kwargs = {"system": system_blocks} if system_blocks else {}
+            # 流式请求在整个生成期间占用提供商容量，同样计入并发上限
+            async with _LLM_SEMAPHORE:
+                async with self.async_client.messages.stream(
+                    model=self.model,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    messages=chat_messages,
+                    **kwargs
+                ) as stream:
+                    async for text in stream.text_stream:
+                        yield text
+
+        elif self.provider == "openai":
+            # 流式请求在整个生成期间占用提供商容量，同样计入并发上限
+            async with _LLM_SEMAPHORE:
+                response = await self.async_client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True
+                )
+                async for chunk in response:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+
+        else:
+            raise ValueError(f"无法生成: 不支持的提供者 {self.provider}")
+
+    def generate_stream(self, prompt: Union[str, List[Dict[str, Any]]], temperature: float = 0.7,
+                        max_tokens: int = config.get("runtime_parameters").get("max_tokens",8192),
+                        stop_when: Optional[Callable[[str], bool]] = None):
+        """
+        同步流式生成LLM响应，逐块产出文本，支持提前终止。
+
+        非流式调用的总延迟等于全部token数乘以单token延迟，即使调用方
+        只关心输出的前一部分也要等满max_tokens。流式输出把可感知延迟
+        降到首token时间；stop_when谓词在每块后检查累积文本，返回True
+        时立即关闭流，剩余未生成的token既不等待也不付费。
+
+        Args:
+            prompt: 提示文本或消息列表
+            temperature: 温度参数
+            max_tokens: 最大生成的token数
+            stop_when: 可选的终止谓词，接收到目前为止的累积文本，
+                返回True时停止生成
+
+        Yields:
+            LLM生成的文本片段
+        """
+        logger.info("=== API 输入 (generate_stream) ===")
+        messages = self._prepare_messages(prompt)
+        logger.debug("消息: %s", messages)
+
+        accumulated = []
+
+        if self.provider == "anthropic":
+            system_blocks, chat_messages = self._split_system_messages(messages)
+            kwargs = {"system": system_blocks} if system_blocks else {}
+            with self.client.messages.stream(
+                model=self.model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                messages=chat_messages,
+                **kwargs
+            ) as stream:
+                for text in stream.text_stream:
+                    yield text
+                    if stop_when is not None:
+                        accumulated.append(text)
+                        if stop_when("".join(accumulated)):
+                            logger.info("终止谓词满足，提前关闭流")
+                            break
+
+        elif self.provider == "openai":
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True
+            )
+            try:
+                for chunk in response:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        text = chunk.choices[0].delta.content
+                        yield text
+                        if stop_when is not None:
+                            accumulated.append(text)
+                            if stop_when("".join(accumulated)):
+                                logger.info("终止谓词满足，提前关闭流")
+                                break
+            finally:
+                response.close()
+
+        else:
+            raise ValueError(f"无法生成: 不支持的提供者 {self.provider}")
+
+    def _split_system_messages(self, messages: List[Dict[str, Any]]):
+        """
+        拆分系统消息与对话消息，并为系统块附加缓存标记。
+
+        Anthropic API要求系统提示通过独立的system参数传递；附加
+        cache_control后，跨调用重复的系统前缀可命中提供商的提示缓存。
+
+        Args:
+            messages: 标准格式的消息列表
+
+        Returns:
+            (system_blocks, chat_messages)元组；没有系统消息时system_blocks为None
+        """
+        system_blocks = []
+        chat_messages = []
+
+        for message in messages:
+            if message.get("role") == "system":
+                system_blocks.append({
+                    "type": "text",
+                    "text": message.get("content", ""),
+                    "cache_control": {"type": "ephemeral"}
+                })
+            else:
+                chat_messages.append(message)
+
+        return (system_blocks or None), chat_messages
+
+    def _log_cached_tokens(self, response) -> None:
+        """记录提示缓存命中的token数（如果提供商返回了该信息）。"""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+
+        # OpenAI: usage.prompt_tokens_details.cached_tokens
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None)
+
+        # Anthropic: usage.cache_read_input_tokens
+        if cached is None:
+            cached = getattr(usage, "cache_read_input_tokens", None)
+
+        if cached:
+            logger.info("提示缓存命中: %s tokens", cached)
+
+    def _response_cache_key(self, kind: str, messages: List[Dict[str, Any]],
+                            functions: Optional[List[Dict[str, Any]]] = None,
+                            temperature: Optional[float] = None,
+                            max_tokens: Optional[int] = None) -> str:
+        """
+        为一次生成请求计算稳定的缓存键。
+
+        键覆盖提供者、模型、采样参数、消息与函数定义，任一变化
+        都会得到不同的键，避免错误命中。
+
+        Args:
+            kind: 请求类型标识（如"generate"）
+            messages: 标准格式的消息列表
+            functions: 可选的函数定义列表
+            temperature: 温度参数
+            max_tokens: 最大生成的token数
+
+        Returns:
+            十六进制摘要字符串
+        """
+        payload = json_utils.dumps_canonical(
+            [kind, self.provider, self.model, temperature, max_tokens, messages, functions])
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
     def _prepare_messages(self, prompt: Union[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
         """
         将输入提示转换为标准消息格式。
@@ -193,27 +1217,65 @@ class LLMProvider:
         Returns:
             标准格式的消息列表
         """
+        # 带标记的对话列表：已规范化前缀直接复用，只转换新增尾部，
+        # 长对话的每轮准备成本从O(N)摊还为O(1)
+        if isinstance(prompt, _ValidatedMessageList):
+            if prompt.validated_length < len(prompt):
+                for i in range(prompt.validated_length, len(prompt)):
+                    message = prompt[i]
+                    if isinstance(message, ChatMessage):
+                        prompt[i] = message.to_dict()
+                prompt.validated_length = len(prompt)
+            return prompt
+
+        # 热路径在前：智能体的build_prompt总是传入消息列表。
+        # 单遍转换ChatMessage，省去此前any()预扫描的重复isinstance检查
+        if isinstance(prompt, list):
+            return [message.to_dict() if isinstance(message, ChatMessage) else message
+                    for message in prompt]
+
         if isinstance(prompt, str):
             # 单条用户消息
             return [{"role": "user", "content": prompt}]
 
-        elif isinstance(prompt, list):
-            # 消息列表
-            return prompt
+        raise TypeError("prompt必须是字符串或消息列表")
 
-        else:
-            raise TypeError("prompt必须是字符串或消息列表")
+    def _memoized_tools(self, functions: List[Dict[str, Any]], kind: str):
+        """
+        按对象身份查询工具格式转换缓存。
+
+        函数模式如今是各智能体的类常量，同一列表对象会在每次LLM调用
+        时重复转换；缓存条目保存对原列表的强引用，既保证id不会被
+        回收复用，也能在传入新对象时自动失效。
+
+        Args:
+            functions: 统一格式的函数定义列表
+            kind: 目标格式标识（"anthropic"或"openai"）
+
+        Returns:
+            缓存的工具列表，未命中时返回None
+        """
+        entry = _TOOL_FORMAT_CACHE.get((id(functions), kind))
+        if entry is not None and entry[0] is functions:
+            return entry[1]
+        return None
 
     def _convert_to_anthropic_format(self, functions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         将统一格式的函数定义转换为Anthropic工具格式。
 
+        转换结果按输入列表的对象身份缓存。
+
         Args:
             functions: 统一格式的函数定义列表
 
         Returns:
             Anthropic格式的工具列表
         """
+        cached = self._memoized_tools(functions, "anthropic")
+        if cached is not None:
+            return cached
+
         tools = []
 
         for func in functions:
@@ -233,18 +1295,30 @@ class LLMProvider:
                     "input_schema": function_data.get("parameters", {})
                 })
 
+        # 在最后一个工具上附加缓存标记，使跨调用不变的工具前缀
+        # 可命中提供商的提示缓存
+        if tools:
+            tools[-1]["cache_control"] = {"type": "ephemeral"}
+
+        _TOOL_FORMAT_CACHE[(id(functions), "anthropic")] = (functions, tools)
         return tools
 
     def _convert_to_openai_format(self, functions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         将统一格式的函数定义转换为OpenAI工具格式。
 
+        转换结果按输入列表的对象身份缓存。
+
         Args:
             functions: 统一格式的函数定义列表
 
         Returns:
             OpenAI格式的工具列表
         """
+        cached = self._memoized_tools(functions, "openai")
+        if cached is not None:
+            return cached
+
         tools = []
 
         for func in functions:
@@ -263,4 +1337,209 @@ class LLMProvider:
                     }
                 })
 
-        return tools
\ No newline at end of file
+        _TOOL_FORMAT_CACHE[(id(functions), "openai")] = (functions, tools)
+        return tools
+    def create_conversation(self, system_prompt: Optional[str] = None) -> 'Conversation':
+        """
+        创建新的对话会话。
+
+        Args:
+            system_prompt: 可选的系统提示
+
+        Returns:
+            新的对话会话对象
+        """
+        return Conversation(self, system_prompt)
+
+
+class Conversation:
+    """
+    管理与LLM的持续多轮对话。
+
+    系统提示在整个会话期间保持字节一致：动态上下文（如检索到的
+    记忆）通过add_memory_context以独立的用户消息注入，而不是拼接
+    进系统提示，从而让提供商的提示缓存在每一轮都能命中静态前缀。
+    """
+
+    # 属性集合固定，槽位化省去每实例的__dict__开销
+    # （短生命周期的对话对象可能被大量创建）
+    __slots__ = ("llm", "messages", "created_at", "turn_count",
+                 "_pending_user", "_last_user", "_last_assistant")
+
+    def __init__(self, llm_provider: LLMProvider, system_prompt: Optional[str] = None):
+        """
+        初始化对话。
+
+        Args:
+            llm_provider: LLM提供者实例
+            system_prompt: 可选的系统提示
+        """
+        self.llm = llm_provider
+        # 带规范化标记的列表：_prepare_messages只处理上次调用后
+        # 新增的消息，长对话不再每轮全量重整
+        self.messages = _ValidatedMessageList()
+
+        # 如果有系统提示，添加到消息中
+        if system_prompt:
+            self.messages.append({
+                "role": "system",
+                "content": system_prompt
+            })
+            self.messages.validated_length = 1
+
+        # 对话元数据
+        self.created_at = datetime.now().isoformat()
+        self.turn_count = 0
+
+        # 增量维护的最后一轮完整对话：add_message时以O(1)更新，
+        # 免去get_last_turn每次从尾部线性回扫消息列表
+        self._pending_user = None
+        self._last_user = None
+        self._last_assistant = None
+
+    def add_message(self, role: str, content: str) -> None:
+        """
+        向对话添加消息。
+
+        Args:
+            role: 消息角色 ("user", "assistant", "system")
+            content: 消息内容
+        """
+        if role not in _VALID_ROLES:
+            raise ValueError(f"无效的消息角色: {role}")
+
+        self.messages.append({
+            "role": role,
+            "content": content
+        })
+        # 角色已验证且为最终dict格式，推进规范化标记
+        self.messages.validated_length = len(self.messages)
+
+        # 只有用户和助手消息计入对话轮次
+        if role in ["user", "assistant"]:
+            self.turn_count += 1
+
+        # 增量更新最后一轮：用户消息先挂起，等到对应的助手回复到达
+        # 才构成一轮完整对话（语义与原先的尾部回扫配对一致）
+        if role == "user":
+            self._pending_user = content
+        elif role == "assistant" and self._pending_user is not None:
+            self._last_user = self._pending_user
+            self._last_assistant = content
+            self._pending_user = None
+
+    def add_memory_context(self, items: List[Dict[str, Any]]) -> None:
+        """
+        以独立的用户消息注入记忆上下文。
+
+        将检索到的记忆拼接进系统提示会让提示前缀每轮都发生变化，
+        使提供商的提示缓存永远无法命中；以独立消息追加则保证
+        system+tools前缀跨轮字节一致。记忆检索的调用方应走本方法，
+        而不是改写messages[0]。
+
+        Args:
+            items: 记忆条目列表
+        """
+        if not items:
+            return
+
+        parts = ["<memory>"]
+        for item in items:
+            parts.append(json_utils.dumps(item) if isinstance(item, dict) else str(item))
+        parts.append("</memory>")
+        self.add_message("user", "\n".join(parts))
+
+    def get_user_input(self, user_input: str, stream: bool = False):
+        """
+        添加用户输入并获取助手回复。
+
+        stream=True时返回逐块产出回复文本的迭代器，调用方可在
+        首token到达后立即开始消费（完整生成的等待降为首token时间）；
+        迭代器耗尽时完整回复会自动记入对话历史。
+
+        Args:
+            user_input: 用户输入文本
+            stream: 是否以流式返回回复
+
+        Returns:
+            助手回复文本；stream=True时为文本块迭代器
+        """
+        # 添加用户消息
+        self.add_message("user", user_input)
+
+        if stream:
+            return self._stream_reply()
+
+        # 获取助手回复
+        response = self.llm.generate(self.messages)
+
+        # 添加助手回复到对话历史
+        self.add_message("assistant", response)
+
+        return response
+
+    def _stream_reply(self):
+        """流式获取助手回复，耗尽后将完整文本记入对话历史。"""
+        chunks = []
+        for chunk in self.llm.generate_stream(self.messages):
+            chunks.append(chunk)
+            yield chunk
+        self.add_message("assistant", "".join(chunks))
+
+    def get_function_call(self, user_input: str, functions: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        添加用户输入并获取函数调用结果。
+
+        Args:
+            user_input: 用户输入文本
+            functions: 函数定义列表
+
+        Returns:
+            函数调用结果
+        """
+        # 添加用户消息
+        self.add_message("user", user_input)
+
+        # 获取函数调用结果
+        result = self.llm.generate_with_function_calling(self.messages, functions)
+
+        # 如果是文本响应，添加到对话历史
+        if "text" in result:
+            self.add_message("assistant", result["text"])
+
+        return result
+
+    def clear_history(self, keep_system_prompt: bool = True) -> None:
+        """
+        清除对话历史。
+
+        Args:
+            keep_system_prompt: 是否保留系统提示
+        """
+        if keep_system_prompt and self.messages and self.messages[0]["role"] == "system":
+            system_message = self.messages[0]
+            self.messages = _ValidatedMessageList([system_message])
+            self.messages.validated_length = 1
+        else:
+            self.messages = _ValidatedMessageList()
+
+        self.turn_count = 0
+        self._pending_user = None
+        self._last_user = None
+        self._last_assistant = None
+
+    def get_messages(self) -> List[Dict[str, Any]]:
+        """获取所有消息。"""
+        return self.messages.copy()
+
+    def get_last_turn(self) -> tuple:
+        """
+        获取最后一轮完整对话（用户输入和助手回复）。
+
+        最后一轮在add_message中增量维护，本方法为O(1)读取，
+        轮询型调用方（UI、遥测）不再随对话变长付出线性回扫开销。
+
+        Returns:
+            (用户输入, 助手回复)元组，如果没有完整的对话轮次则返回(None, None)
+        """
+        return (self._last_user, self._last_assistant)
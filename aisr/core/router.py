@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Callable, Dict, Any
 
 class Router:
     """
@@ -10,6 +10,10 @@ class Router:
     def __init__(self):
         """初始化路由器"""
         self.components = {}  # 存储注册组件的字典
+        # 已解析方法缓存：{函数路径: (组件名, 方法名, 绑定方法)}。
+        # 组件与方法的组合是小而有限的集合，缓存后每次route省去
+        # 字符串切分、字典查找、getattr与callable校验的纯Python开销
+        self._method_cache: Dict[str, tuple] = {}
 
     def register(self, name: str, component) -> None:
         """
@@ -20,29 +24,27 @@ class Router:
             component: 组件实例
         """
         self.components[name] = component
+        # 组件可能被替换，已缓存的绑定方法随之失效
+        self._method_cache.clear()
 
-    def route(self, function_call: Dict[str, Any]) -> Dict[str, Any]:
+    def _resolve(self, function_path: str) -> tuple:
         """
-        将函数调用路由到适当的组件。
+        解析函数路径为绑定方法，结果缓存供后续调用复用。
 
         Args:
-            function_call: 包含'function'和'parameters'键的字典
+            function_path: 'component.method'格式的函数路径
 
         Returns:
-            被调用组件的结果
+            (组件名, 方法名, 绑定方法)元组
 
         Raises:
-            ValueError: 如果找不到组件或方法
+            ValueError: 如果路径格式无效、找不到组件或方法
         """
-        # 解析函数调用
-        function_path = function_call.get("function", "")
-        parameters = function_call.get("parameters", {})
-
-        if "." not in function_path:
+        # partition永不抛错且单遍完成切分与格式校验
+        component_name, sep, method_name = function_path.partition(".")
+        if not sep:
             raise ValueError(f"无效的函数路径: {function_path}。预期格式: 'component.method'")
 
-        component_name, method_name = function_path.split(".", 1)
-
         # 获取组件
         component = self.components.get(component_name)
         if not component:
@@ -53,14 +55,36 @@ class Router:
         if not method or not callable(method):
             raise ValueError(f"未找到方法: {method_name} in component {component_name}")
 
-        # 执行方法
+        resolved = (component_name, method_name, method)
+        self._method_cache[function_path] = resolved
+        return resolved
+
+    def route(self, function_call: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        将函数调用路由到适当的组件。
+
+        Args:
+            function_call: 包含'function'和'parameters'键的字典
+
+        Returns:
+            被调用组件的结果
+
+        Raises:
+            ValueError: 如果找不到组件或方法
+        """
+        # 热路径压到最少字节码：一次缓存查找加直接调用，
+        # 元组只在异常分支才解包
+        resolved = self._method_cache.get(function_call.get("function", ""))
+        if resolved is None:
+            resolved = self._resolve(function_call.get("function", ""))
+
         try:
-            return method(**parameters)
+            return resolved[2](**function_call.get("parameters", {}))
         except Exception as e:
             # 实际实现中会包含更复杂的错误处理、日志记录和可能的重试逻辑
             return {
                 "error": str(e),
-                "component": component_name,
-                "method": method_name,
+                "component": resolved[0],
+                "method": resolved[1],
                 "status": "failed"
             }
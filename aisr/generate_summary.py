@@ -6,65 +6,105 @@ This script creates a comprehensive summary of all Python files in the current d
 and its subdirectories, generating a single text document that can be shared with others.
 """
 
+import concurrent.futures
 import os
 import datetime
-import re
+
+# Precomputed directory filter: frozenset gives O(1) membership checks
+# in the traversal hot loop
+_SKIP_DIRS = frozenset({"__pycache__"})
+
+# 1 MiB output buffer batches the many small writes into few syscalls
+_WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+def _iter_py_files(root_dir):
+    """
+    Yield paths of Python files under root_dir using os.scandir.
+
+    scandir reuses the directory entry's cached file type, avoiding the
+    extra per-entry stat calls os.walk-based filtering would trigger.
+    Hidden directories and __pycache__ are skipped.
+    """
+    stack = [root_dir]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = os.scandir(current)
+        except OSError as e:
+            print(f"Error scanning {current}: {e}")
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if not entry.name.startswith('.') and entry.name not in _SKIP_DIRS:
+                        stack.append(entry.path)
+                elif entry.name.endswith('.py') and "generate_summary" not in entry.name:
+                    yield entry.path
+
+
+def _read_file(file_path):
+    """Read a file's text content, returning None on failure."""
+    try:
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+            return f.read()
+    except OSError as e:
+        print(f"Error reading {file_path}: {e}")
+        return None
 
 
 def generate_project_summary(root_dir='.', output_file='aisr_project_summary3.txt'):
     """
     Generate a summary of all Python files in the project.
 
+    File reads are parallelized with a thread pool (each open/read is
+    latency-bound I/O, so threads overlap the waits), and contents are
+    streamed to the output file and released immediately after writing
+    instead of being held in memory for the whole run.
+
     Args:
         root_dir: Root directory to scan (default is current directory)
         output_file: Output file name
     """
-    # Dictionary to store directory structure
-    project_structure = {}
-
     # Get absolute path for root directory
     root_dir = os.path.abspath(root_dir)
     root_dir_name = os.path.basename(root_dir)
 
-    # Walk through directory tree
-    for dirpath, dirnames, filenames in os.walk(root_dir):
-        # Skip hidden directories and __pycache__
-        dirnames[:] = [d for d in dirnames if not d.startswith('.') and d != '__pycache__']
-
-        # Filter for Python files
-        py_files = [f for f in filenames if f.endswith('.py') and "generate_summary" not in f]
-
-        if py_files:
-            # Calculate relative path from root
-            rel_path = os.path.relpath(dirpath, root_dir)
-            if rel_path == '.':
-                rel_path = root_dir_name
-            else:
-                rel_path = os.path.join(root_dir_name, rel_path)
-
-            # Initialize directory in structure if not exists
-            if rel_path not in project_structure:
-                project_structure[rel_path] = []
-
-            # Process each Python file
-            for py_file in py_files:
-                file_path = os.path.join(dirpath, py_file)
-
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-
-                    # Add file info to structure
-                    project_structure[rel_path].append({
-                        'filename': py_file,
-                        'path': file_path,
-                        'content': content
-                    })
-                except Exception as e:
-                    print(f"Error reading {file_path}: {e}")
-
-    # Generate the summary text
-    with open(output_file, 'w', encoding='utf-8') as out_file:
+    # Collect file paths first (cheap), then read contents concurrently
+    file_paths = list(_iter_py_files(root_dir))
+
+    # Dictionary to store directory structure: {rel_dir: [(filename, path)]}
+    project_structure = {}
+    for file_path in file_paths:
+        rel_path = os.path.relpath(os.path.dirname(file_path), root_dir)
+        if rel_path == '.':
+            rel_path = root_dir_name
+        else:
+            rel_path = os.path.join(root_dir_name, rel_path)
+        project_structure.setdefault(rel_path, []).append(
+            (os.path.basename(file_path), file_path))
+
+    # Concurrent reads: threads overlap per-file open latency
+    max_workers = min(32, (os.cpu_count() or 1) * 4)
+    if file_paths:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            contents = dict(zip(file_paths, executor.map(_read_file, file_paths)))
+    else:
+        contents = {}
+
+    # Drop files that failed to read
+    for directory in list(project_structure):
+        project_structure[directory] = [
+            (name, path) for name, path in project_structure[directory]
+            if contents.get(path) is not None
+        ]
+        if not project_structure[directory]:
+            del project_structure[directory]
+
+    total_lines = 0
+
+    # Generate the summary text, streaming each content block
+    with open(output_file, 'w', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as out_file:
         # Write header
         out_file.write("=" * 80 + "\n")
         out_file.write(f"AISR PROJECT CODE SUMMARY\n")
@@ -75,29 +115,29 @@ def generate_project_summary(root_dir='.', output_file='aisr_project_summary3.tx
         out_file.write("## PROJECT STRUCTURE\n\n")
         for directory, files in sorted(project_structure.items()):
             out_file.write(f"- {directory}/\n")
-            for file_info in sorted(files, key=lambda x: x['filename']):
-                out_file.write(f"  - {file_info['filename']}\n")
+            for filename, _ in sorted(files):
+                out_file.write(f"  - {filename}\n")
         out_file.write("\n\n")
 
-        # Write file contents
+        # Write file contents, freeing each block right after it is written
         out_file.write("## FILE CONTENTS\n\n")
         for directory, files in sorted(project_structure.items()):
             out_file.write(f"### Directory: {directory}/\n\n")
 
-            for file_info in sorted(files, key=lambda x: x['filename']):
-                out_file.write(f"#### {file_info['filename']}\n")
+            for filename, file_path in sorted(files):
+                content = contents.pop(file_path)
+                total_lines += len(content.splitlines())
+                out_file.write(f"#### {filename}\n")
                 out_file.write("```python\n")
-                out_file.write(file_info['content'])
-                if not file_info['content'].endswith('\n'):
+                out_file.write(content)
+                if not content.endswith('\n'):
                     out_file.write('\n')
                 out_file.write("```\n\n")
+                del content
 
     # Calculate statistics
     total_files = sum(len(files) for files in project_structure.values())
     total_dirs = len(project_structure)
-    total_lines = sum(len(file_info['content'].splitlines())
-                      for files in project_structure.values()
-                      for file_info in files)
 
     print(f"Summary generated in {output_file}")
     print(f"Processed {total_files} Python files across {total_dirs} directories")
@@ -110,4 +150,4 @@ if __name__ == "__main__":
     output_file, total_files, total_dirs, total_lines = generate_project_summary()
 
     print("\nSummary complete! You can now share the generated file in your next conversation.")
-    print(f"The file contains {total_lines} lines of code from {total_files} Python files.")
\ No newline at end of file
+    print(f"The file contains {total_lines} lines of code from {total_files} Python files.")
@@ -3,11 +3,17 @@
 """
 
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, List, Optional
 from datetime import datetime
 
 from aisr.memory.base import Memory
 
+# numpy为可选依赖，仅向量化相关性检索需要；未安装时退回启发式检索
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 class AgentMemory(Memory):
     """
@@ -15,18 +21,33 @@ class AgentMemory(Memory):
 
     用于存储智能体的交互历史，跟踪思考过程，
     并为后续提示构建提供上下文。
+
+    提供embed_fn时，交互在add()时预先嵌入一次，get_relevant的相关性
+    评分退化为一次矩阵-向量乘（向量化BLAS），而非逐条的Python循环。
     """
 
-    def __init__(self, agent_name: str):
+    # 属性集合固定，槽位化省去每实例的__dict__开销（每个智能体
+    # 一个实例，研究运行中会创建数十上百个）
+    __slots__ = ("agent_name", "interactions", "metadata", "embed_fn",
+                 "_emb", "_emb_count")
+
+    def __init__(self, agent_name: str, embed_fn: Optional[Callable[[str], Any]] = None):
         """
         初始化智能体内存。
 
         Args:
             agent_name: 智能体的名称
+            embed_fn: 可选的文本嵌入函数（如LLMProvider._embed_text），
+                     提供时启用基于向量相似度的相关性检索
         """
         self.agent_name = agent_name
         self.interactions = []  # 存储智能体的交互历史
         self.metadata = {}  # 存储额外的元数据
+        self.embed_fn = embed_fn
+        # 归一化嵌入矩阵：行i对应interactions[i]，容量按需翻倍，
+        # 摊还后追加为O(1)，避免每次add整体复制的O(N^2)
+        self._emb = None
+        self._emb_count = 0
         logging.debug(f"已初始化 {agent_name} 的智能体内存")
 
     def add(self, entry: Dict[str, Any]) -> None:
@@ -52,8 +73,46 @@ class AgentMemory(Memory):
 
         # 添加到交互历史
         self.interactions.append(entry)
+
+        # 预先嵌入：写路径各付一次嵌入成本，读路径的相关性评分
+        # 只剩一次gemv
+        if self.embed_fn is not None and np is not None:
+            self._embed_entry(entry)
+
         logging.debug(f"{self.agent_name} 内存: 已添加新的交互记录")
 
+    def _embed_entry(self, entry: Dict[str, Any]) -> None:
+        """
+        计算并缓存条目的归一化嵌入向量。
+
+        向量同时缓存在条目字典（"_embedding"键，可随条目序列化）
+        和预分配的矩阵中；矩阵容量不足时翻倍扩容，摊还O(1)追加。
+
+        Args:
+            entry: 交互条目
+        """
+        vector = entry.get("_embedding")
+        if vector is None:
+            raw = self.embed_fn(str(entry.get("input", "")))
+            if raw is None:
+                entry["_embedding"] = None
+                return
+            vector = np.asarray(raw, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            if norm > 0:
+                vector = vector / norm
+            entry["_embedding"] = vector
+
+        if self._emb is None:
+            self._emb = np.empty((8, vector.shape[0]), dtype=np.float32)
+        elif self._emb_count == self._emb.shape[0]:
+            grown = np.empty((self._emb.shape[0] * 2, self._emb.shape[1]), dtype=np.float32)
+            grown[:self._emb_count] = self._emb[:self._emb_count]
+            self._emb = grown
+
+        self._emb[self._emb_count] = vector
+        self._emb_count += 1
+
     def get_relevant(self, context: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         检索与当前上下文相关的历史交互。
@@ -75,6 +134,12 @@ class AgentMemory(Memory):
         if len(self.interactions) <= max_items:
             return self.interactions.copy()
 
+        # 向量化相关性检索：嵌入矩阵与交互列表对齐时，
+        # 评分为一次gemv加argpartition，无逐条Python循环
+        ranked = self._rank_by_similarity(context, max_items, recency_weight)
+        if ranked is not None:
+            return ranked
+
         # 强调最近的交互
         if recency_weight > 0.9:
             # 如果最近性非常重要，只返回最近的项目
@@ -90,9 +155,58 @@ class AgentMemory(Memory):
 
         return older_items + recent_items
 
+    def _rank_by_similarity(self, context: Dict[str, Any], max_items: int,
+                            recency_weight: float) -> Optional[List[Dict[str, Any]]]:
+        """
+        按嵌入相似度与最近性的加权组合检索交互。
+
+        相似度为归一化嵌入矩阵与查询向量的单次矩阵-向量乘，
+        Top-K选取用argpartition（O(N)）而非全量排序。
+
+        Args:
+            context: 检索上下文，查询文本取自relevance_key指定的键
+            max_items: 返回的最大项目数
+            recency_weight: 最近性权重（0-1）
+
+        Returns:
+            按时间顺序排列的相关交互列表；嵌入不可用或查询缺失时
+            返回None（调用方退回启发式路径）
+        """
+        if self.embed_fn is None or np is None:
+            return None
+        # 任何条目嵌入失败都会导致矩阵与交互列表错位，放弃语义路径
+        if self._emb_count != len(self.interactions):
+            return None
+
+        relevance_key = context.get("relevance_key", "query")
+        query_text = context.get(relevance_key)
+        if not query_text:
+            return None
+
+        raw = self.embed_fn(str(query_text))
+        if raw is None:
+            return None
+        query = np.asarray(raw, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        count = self._emb_count
+        similarity = self._emb[:count] @ query
+        # 最近性得分：最旧0分，最新1分，与相似度线性混合
+        recency = np.linspace(0.0, 1.0, count, dtype=np.float32)
+        final = recency_weight * recency + (1.0 - recency_weight) * similarity
+
+        top = np.argpartition(-final, max_items - 1)[:max_items]
+        # 按时间顺序返回（与启发式路径一致）
+        top.sort()
+        return [self.interactions[i] for i in top]
+
     def clear(self) -> None:
         """清除所有存储的交互。"""
         self.interactions = []
+        self._emb = None
+        self._emb_count = 0
         logging.debug(f"{self.agent_name} 内存: 已清除所有交互")
 
     def summarize(self, context: Dict[str, Any] = None) -> str:
@@ -125,6 +239,18 @@ class AgentMemory(Memory):
 
         return "\n".join(summary)
 
+    def get_interactions(self) -> tuple:
+        """
+        获取全部交互历史的只读视图。
+
+        返回元组而非列表拷贝：消费方无法误改内部列表结构，
+        且只复制指针，不复制条目本身。
+
+        Returns:
+            交互历史的元组视图
+        """
+        return tuple(self.interactions)
+
     def get_last_interaction(self) -> Optional[Dict[str, Any]]:
         """获取最近的一次交互。"""
         if not self.interactions:
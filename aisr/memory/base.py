@@ -8,6 +8,9 @@ class Memory(abc.ABC):
     负责在研究过程中存储、检索和管理信息状态。
     """
 
+    # 空槽位声明：基类不引入__dict__，子类的__slots__才能真正生效
+    __slots__ = ()
+
     @abc.abstractmethod
     def add(self, entry: Dict[str, Any]) -> None:
         """
@@ -3,7 +3,8 @@
 """
 
 import logging
-from typing import Dict, Any, List, Optional
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional
 
 
 class GlobalMemory:
@@ -14,6 +15,9 @@ class GlobalMemory:
     因为它有特殊的接口和用途。
     """
 
+    # 唯一属性为内部存储字典，槽位化省去每实例的__dict__开销
+    __slots__ = ("_store",)
+
     def __init__(self):
         """初始化全局内存。"""
         self._store = {}
@@ -75,11 +79,27 @@ class GlobalMemory:
 
         logging.debug("全局内存: 已清除研究数据，保留系统配置")
 
+    def view(self) -> Mapping[str, Any]:
+        """
+        获取所有全局状态的只读视图。
+
+        视图零拷贝地反映存储的实时内容，适合遥测、日志等只读消费方；
+        需要与后续修改隔离的快照请使用get_all。
+
+        Returns:
+            存储的只读映射视图
+        """
+        return MappingProxyType(self._store)
+
     def get_all(self) -> Dict[str, Any]:
         """
-        获取所有全局状态。
+        获取所有全局状态的浅拷贝快照。
+
+        每次调用分配O(N)的新字典；只读消费方应优先使用view()，
+        零拷贝且始终反映最新状态。
 
         Returns:
             包含所有状态键值对的字典
         """
+        logging.debug("全局内存: get_all返回O(N)拷贝，只读场景建议改用view()")
         return self._store.copy()
\ No newline at end of file
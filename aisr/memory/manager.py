@@ -2,6 +2,7 @@
 内存管理系统，负责管理AISR系统中的各类记忆。
 """
 
+import collections
 import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime
@@ -11,6 +12,10 @@ from aisr.memory.global_memory import GlobalMemory
 from aisr.memory.agent_memory import AgentMemory
 from aisr.memory.workflow_memory import WorkflowMemory
 
+# 研究历史的最大保留条数：长会话中无界列表会持续占用内存，
+# deque(maxlen)在达到上限后自动淘汰最旧记录
+_RESEARCH_HISTORY_MAXLEN = 10000
+
 
 class MemoryManager:
     """
@@ -27,6 +32,11 @@ class MemoryManager:
         # 各组件的专用内存
         self.component_memories: Dict[str, Memory] = {}
 
+        # 研究历史用有界deque存储：追加为O(1)且无需get/set往返，
+        # 内存占用有上界
+        self.global_memory.set("research_history",
+                               collections.deque(maxlen=_RESEARCH_HISTORY_MAXLEN))
+
         logging.info("内存管理器初始化完成")
 
     def get_memory_view(self, component_name: str) -> Memory:
@@ -85,6 +95,10 @@ class MemoryManager:
         for memory in self.component_memories.values():
             memory.clear()
 
+        # clear_research_data会丢弃历史deque，重建空的有界容器
+        self.global_memory.set("research_history",
+                               collections.deque(maxlen=_RESEARCH_HISTORY_MAXLEN))
+
         # 记录新的研究开始
         self.global_memory.set("research_start_time", datetime.now().isoformat())
         logging.info("已清除研究状态，准备新的研究")
@@ -97,15 +111,36 @@ class MemoryManager:
             step_name: 步骤名称
             data: 步骤数据
         """
-        # 获取现有历史记录
-        history = self.global_memory.get("research_history", [])
-
-        # 添加新步骤
-        step_record = {
+        # 获取现有历史记录（初始化时已创建，防御性兜底一次）
+        history = self.global_memory.get("research_history")
+        if history is None:
+            history = collections.deque(maxlen=_RESEARCH_HISTORY_MAXLEN)
+            self.global_memory.set("research_history", history)
+
+        # 添加新步骤；deque原地追加，无需set回写
+        history.append({
             "step": step_name,
             "timestamp": datetime.now().isoformat(),
             "data": data
-        }
+        })
 
-        history.append(step_record)
-        self.global_memory.set("research_history", history)
\ No newline at end of file
+    def record_research_steps(self, steps: List[Dict[str, Any]]) -> None:
+        """
+        批量记录研究步骤到历史记录。
+
+        工作流侧攒批后一次提交，单次路由调用取代逐条的组件往返。
+
+        Args:
+            steps: 步骤列表，每项包含'step_name'和'data'键
+        """
+        history = self.global_memory.get("research_history")
+        if history is None:
+            history = collections.deque(maxlen=_RESEARCH_HISTORY_MAXLEN)
+            self.global_memory.set("research_history", history)
+
+        timestamp = datetime.now().isoformat()
+        history.extend({
+            "step": step.get("step_name"),
+            "timestamp": step.get("timestamp", timestamp),
+            "data": step.get("data")
+        } for step in steps)
\ No newline at end of file
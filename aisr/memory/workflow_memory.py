@@ -2,11 +2,86 @@
 工作流内存模块，用于管理工作流执行状态和结果。
 """
 
+import collections
+import hashlib
+import itertools
 import logging
-from typing import Dict, Any, List, Optional
-from datetime import datetime
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Any, List, Optional, Union
 
 from aisr.memory.base import Memory
+from aisr.utils import json_utils
+from aisr.utils.config import config
+
+# 历史时间戳的渲染格式；time.strftime比datetime.now().isoformat()快数倍
+_DATE_FMT = "%Y-%m-%dT%H:%M:%S"
+
+# 工作流结果的磁盘持久化：默认关闭，开启后步骤结果跨进程重启复用，
+# 重复研究运行无需重付搜索API与爬取的网络成本
+_DISK_CACHE_ENABLED = config.get("runtime_parameters").get("workflow_disk_cache", False)
+_DISK_CACHE_DIR = os.getenv("AISR_WORKFLOW_CACHE_DIR", ".aisr-workflow-cache")
+
+
+@dataclass(slots=True)
+class _HistoryEntry:
+    """
+    单条执行历史。
+
+    槽位化的固定布局对象，代替每次add()分配的历史字典，
+    单条开销约为dict的一半；对外渲染时才转回字典。
+    """
+    ts: Union[float, str]
+    type: Optional[str]
+    step_name: Optional[str] = None
+    result_summary: Optional[str] = None
+    state_key: Optional[str] = None
+    value_summary: Optional[str] = None
+
+
+class _StepResultStore:
+    """
+    步骤结果的SQLite持久层。
+
+    键为"工作流|步骤|签名"形式的文本，值为JSON序列化的结果；
+    单文件零运维，连接加锁供多线程使用。
+    """
+
+    def __init__(self, cache_dir: str):
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(cache_dir, "workflow_cache.sqlite3"),
+                                     check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS step_results (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+
+    def get(self, key: str):
+        """读取持久化结果，未命中或无法反序列化时返回None。"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM step_results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        try:
+            return json_utils.loads(row[0])
+        except (ValueError, TypeError):
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        """持久化结果；不可JSON序列化的结果静默跳过。"""
+        try:
+            payload = json_utils.dumps(value)
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO step_results (key, value) VALUES (?, ?)",
+                (key, payload))
+            self._conn.commit()
 
 
 class WorkflowMemory(Memory):
@@ -17,18 +92,44 @@ class WorkflowMemory(Memory):
     为工作流的连续和迭代执行提供状态管理。
     """
 
-    def __init__(self, workflow_name: str):
+    def __init__(self, workflow_name: str, persist_dir: Optional[str] = None,
+                 history_cap: int = 10_000):
         """
         初始化工作流内存。
 
         Args:
             workflow_name: 工作流的名称
+            persist_dir: 磁盘持久化目录，显式传入时即启用持久化
+            history_cap: 执行历史的最大条目数，超出后自动淘汰最旧条目
         """
         self.workflow_name = workflow_name
-        self.steps = {}  # 存储步骤结果 {step_name: [result1, result2, ...]}
+        # 步骤结果的SoA布局：所有结果按写入顺序存进一个连续的
+        # append-only列表，按步骤名的索引只存整数下标，
+        # 取代原先每步骤一个小列表的指针追逐结构
+        self._results = []  # 所有步骤结果（全局写入顺序）
+        self._step_idx = {}  # {step_name: [_results中的下标, ...]}
+        # 各步骤最新结果的索引 {step_name: result}：写入时维护，
+        # latest_steps检索不再逐步骤扫描
+        self._latest = {}
         self.state = {}  # 存储工作流状态
-        self.history = []  # 存储执行历史
-        logging.debug(f"已初始化 {workflow_name} 的工作流内存")
+        # 有界deque：长时运行的工作流历史不再无限增长，
+        # append为O(1)且越界时自动淘汰最旧条目
+        self._history_cap = history_cap
+        self.history = collections.deque(maxlen=history_cap)  # 存储执行历史
+        # 内容寻址结果缓存 {(step_name, 参数指纹): result}：
+        # 相同输入的重复步骤直接短路，不再重跑昂贵的上游工具
+        self._fingerprint_cache: Dict[tuple, Any] = {}
+        # 磁盘持久层：配置开启或显式传入persist_dir时创建，
+        # 步骤结果按签名跨会话复用
+        if _DISK_CACHE_ENABLED or persist_dir is not None:
+            self._disk = _StepResultStore(persist_dir or _DISK_CACHE_DIR)
+        else:
+            self._disk = None
+        logging.debug("已初始化 %s 的工作流内存", workflow_name)
+
+    def _disk_key(self, step_name: str, signature: str) -> str:
+        """构建磁盘持久层的键。"""
+        return f"{self.workflow_name}|{step_name}|{signature}"
 
     def add(self, entry: Dict[str, Any]) -> None:
         """
@@ -39,41 +140,48 @@ class WorkflowMemory(Memory):
                   对于'step_result'类型，还需要'step_name'和'result'键
                   对于'state_update'类型，还需要'key'和'value'键
         """
-        entry_type = entry.get("type")
-        timestamp = entry.get("timestamp", datetime.now().isoformat())
+        # 绑定一次get方法，后续字段读取省去重复的属性查找
+        get = entry.get
+        entry_type = get("type")
+        # 时间戳以float记录（time.time()开销远小于datetime格式化），
+        # ISO字符串推迟到历史真正对外呈现时才生成
+        timestamp = get("timestamp", time.time())
 
-        # 添加执行历史
-        history_entry = {
-            "timestamp": timestamp,
-            "type": entry_type
-        }
+        # 添加执行历史（槽位化对象，见_HistoryEntry）
+        history_entry = _HistoryEntry(ts=timestamp, type=entry_type)
 
         if entry_type == "step_result":
-            step_name = entry.get("step_name")
-            result = entry.get("result")
+            step_name = get("step_name")
+            result = get("result")
 
             if not step_name:
                 logging.warning("工作流内存: 步骤结果缺少步骤名称")
                 return
 
-            # 初始化步骤结果列表（如果不存在）
-            if step_name not in self.steps:
-                self.steps[step_name] = []
+            # 单次探测取出或创建下标列表，避免"in检查+取值"的
+            # 重复哈希查找（这是工作流最热的写路径）
+            idx_bucket = self._step_idx.get(step_name)
+            if idx_bucket is None:
+                idx_bucket = self._step_idx[step_name] = []
+
+            # 追加结果并更新下标与最新结果索引
+            idx_bucket.append(len(self._results))
+            self._results.append(result)
+            self._latest[step_name] = result
 
-            # 添加结果
-            self.steps[step_name].append(result)
+            # 持久化最新结果，供后续会话的get_latest_result回退读取
+            if self._disk is not None:
+                self._disk.set(self._disk_key(step_name, "latest"), result)
 
             # 更新历史条目
-            history_entry.update({
-                "step_name": step_name,
-                "result_summary": self._summarize_result(result)
-            })
+            history_entry.step_name = step_name
+            history_entry.result_summary = self._summarize_result(result)
 
-            logging.debug(f"{self.workflow_name} 内存: 已添加 '{step_name}' 步骤的结果")
+            logging.debug("%s 内存: 已添加 '%s' 步骤的结果", self.workflow_name, step_name)
 
         elif entry_type == "state_update":
-            key = entry.get("key")
-            value = entry.get("value")
+            key = get("key")
+            value = get("value")
 
             if not key:
                 logging.warning("工作流内存: 状态更新缺少键")
@@ -82,17 +190,16 @@ class WorkflowMemory(Memory):
             # 更新状态
             self.state[key] = value
 
-            # 更新历史条目
-            history_entry.update({
-                "state_key": key,
-                "value_summary": str(value)[:100] + "..." if isinstance(value, str) and len(str(value)) > 100 else str(
-                    value)
-            })
+            # 更新历史条目（str()只做一次：大对象的重复转换
+            # 意味着多KB的重复分配）
+            s = value if isinstance(value, str) else str(value)
+            history_entry.state_key = key
+            history_entry.value_summary = s[:100] + "..." if len(s) > 100 else s
 
-            logging.debug(f"{self.workflow_name} 内存: 已更新状态 '{key}'")
+            logging.debug("%s 内存: 已更新状态 '%s'", self.workflow_name, key)
 
         else:
-            logging.warning(f"工作流内存: 未知的条目类型: {entry_type}")
+            logging.warning("工作流内存: 未知的条目类型: %s", entry_type)
             return
 
         # 添加到历史
@@ -111,54 +218,126 @@ class WorkflowMemory(Memory):
         Returns:
             相关内存条目的列表
         """
+        # 各分支用列表推导一次性构建，省去循环体内逐条append的
+        # 方法查找与调用开销；context.get同样只绑定一次
+        get = context.get
         result = []
 
-        # 检索特定步骤的结果
-        step_name = context.get("step_name")
-        if step_name and step_name in self.steps:
-            for step_result in self.steps[step_name]:
-                result.append({
-                    "type": "step_result",
-                    "step_name": step_name,
-                    "result": step_result
-                })
-
-        # 检索所有步骤的最新结果
-        if context.get("latest_steps", False):
-            for step_name, results in self.steps.items():
-                if results:  # 如果有结果
-                    result.append({
-                        "type": "step_result",
-                        "step_name": step_name,
-                        "result": results[-1]  # 最新结果
-                    })
+        # 检索特定步骤的结果（通过下标索引回连续结果列表）
+        step_name = get("step_name")
+        if step_name:
+            results_arr = self._results
+            result += [{"type": "step_result", "step_name": step_name,
+                        "result": results_arr[i]}
+                       for i in self._step_idx.get(step_name, ())]
+
+        # 检索所有步骤的最新结果（直接读写入时维护的索引，
+        # 索引里只有产生过结果的步骤，无需空值检查）
+        if get("latest_steps", False):
+            result += [{"type": "step_result", "step_name": k, "result": v}
+                       for k, v in self._latest.items()]
 
         # 检索请求的状态键
-        state_keys = context.get("state_keys", [])
+        state_keys = get("state_keys", [])
         if state_keys:
-            for key in state_keys:
-                if key in self.state:
-                    result.append({
-                        "type": "state",
-                        "key": key,
-                        "value": self.state[key]
-                    })
-
-        # 可选包含历史
-        if context.get("include_history", False):
+            _missing = object()
+            state_get = self.state.get
+            result += [{"type": "state", "key": key, "value": value}
+                       for key in state_keys
+                       if (value := state_get(key, _missing)) is not _missing]
+
+        # 可选包含历史（时间戳在此时才格式化）
+        if get("include_history", False):
             result.append({
                 "type": "history",
-                "entries": self.history
+                "entries": self._render_history()
             })
 
         return result
 
+    def _render_history(self) -> List[Dict[str, Any]]:
+        """
+        渲染执行历史为对外格式。
+
+        写路径只存槽位化的_HistoryEntry（float时间戳），这里才
+        转回字典并按需格式化为ISO字符串；调用方显式传入的
+        字符串时间戳原样保留。
+
+        Returns:
+            带"timestamp"字符串的历史条目字典列表
+        """
+        rendered = []
+        for entry in self.history:
+            ts = entry.ts
+            d = {
+                "timestamp": (ts if isinstance(ts, str)
+                              else time.strftime(_DATE_FMT, time.localtime(ts))),
+                "type": entry.type
+            }
+            if entry.step_name is not None:
+                d["step_name"] = entry.step_name
+                d["result_summary"] = entry.result_summary
+            if entry.state_key is not None:
+                d["state_key"] = entry.state_key
+                d["value_summary"] = entry.value_summary
+            rendered.append(d)
+        return rendered
+
+    def get_or_compute(self, step_name: str, params: Dict[str, Any],
+                       fn: Callable[[], Any], cacheable: bool = True) -> Any:
+        """
+        按(步骤名, 参数指纹)缓存步骤结果，命中时跳过执行。
+
+        搜索、抓取等步骤的开销在网络往返，重规划循环中相同参数的
+        步骤会被反复触发；以参数内容的哈希为指纹短路重复执行，
+        命中成本只有一次哈希加字典查找。非确定性步骤（如依赖
+        实时状态的工具）应传cacheable=False，照常执行但不缓存。
+
+        Args:
+            step_name: 步骤名称
+            params: 决定步骤输出的输入参数
+            fn: 执行步骤的零参调用
+            cacheable: 该步骤是否可按输入缓存
+
+        Returns:
+            步骤结果（缓存命中时为此前的结果对象）
+        """
+        if not cacheable:
+            result = fn()
+            self.save_result(step_name, result)
+            return result
+
+        fingerprint = hashlib.blake2b(json_utils.dumps_canonical(params),
+                                      digest_size=16).hexdigest()
+        key = (step_name, fingerprint)
+        if key in self._fingerprint_cache:
+            logging.debug("%s 内存: 步骤 '%s' 命中结果缓存", self.workflow_name, step_name)
+            return self._fingerprint_cache[key]
+
+        # 磁盘回退：上一会话的同签名结果直接复用，并提升到内存缓存
+        if self._disk is not None:
+            cached = self._disk.get(self._disk_key(step_name, fingerprint))
+            if cached is not None:
+                logging.debug("%s 内存: 步骤 '%s' 命中磁盘结果缓存", self.workflow_name, step_name)
+                self._fingerprint_cache[key] = cached
+                return cached
+
+        result = fn()
+        self._fingerprint_cache[key] = result
+        if self._disk is not None:
+            self._disk.set(self._disk_key(step_name, fingerprint), result)
+        self.save_result(step_name, result)
+        return result
+
     def clear(self) -> None:
         """清除所有存储的内存。"""
-        self.steps = {}
+        self._results = []
+        self._step_idx = {}
+        self._latest = {}
         self.state = {}
-        self.history = []
-        logging.debug(f"{self.workflow_name} 内存: 已清除所有数据")
+        self.history = collections.deque(maxlen=self._history_cap)
+        self._fingerprint_cache = {}
+        logging.debug("%s 内存: 已清除所有数据", self.workflow_name)
 
     def summarize(self, context: Dict[str, Any] = None) -> str:
         """
@@ -170,43 +349,38 @@ class WorkflowMemory(Memory):
         Returns:
             内存内容的摘要字符串
         """
-        summary_parts = [f"{self.workflow_name} 工作流内存摘要:"]
-
-        # 步骤摘要
-        if self.steps:
-            step_summary = []
-            for step_name, results in self.steps.items():
-                step_summary.append(f"- {step_name}: {len(results)} 个结果")
-            summary_parts.append("步骤结果:\n" + "\n".join(step_summary))
-        else:
-            summary_parts.append("步骤结果: 无")
-
-        # 状态摘要
-        if self.state:
-            state_summary = []
-            for key, value in self.state.items():
-                value_str = str(value)
-                if len(value_str) > 50:
-                    value_str = value_str[:47] + "..."
-                state_summary.append(f"- {key}: {value_str}")
-            summary_parts.append("工作流状态:\n" + "\n".join(state_summary))
-        else:
-            summary_parts.append("工作流状态: 无")
-
-        # 历史摘要
-        if self.history:
-            summary_parts.append(f"执行历史: {len(self.history)} 个条目")
-        else:
-            summary_parts.append("执行历史: 无")
-
-        return "\n\n".join(summary_parts)
+        # 各段以生成器惰性产出并一次join，跳过step_summary/
+        # state_summary等中间列表的分配
+        def _parts():
+            yield f"{self.workflow_name} 工作流内存摘要:"
+
+            # 步骤摘要（计数直接取下标列表长度）
+            if self._step_idx:
+                yield "步骤结果:\n" + "\n".join(
+                    f"- {step_name}: {len(indices)} 个结果"
+                    for step_name, indices in self._step_idx.items())
+            else:
+                yield "步骤结果: 无"
+
+            # 状态摘要
+            if self.state:
+                yield "工作流状态:\n" + "\n".join(
+                    f"- {key}: {s if len(s) <= 50 else s[:47] + '...'}"
+                    for key, s in ((k, str(v)) for k, v in self.state.items()))
+            else:
+                yield "工作流状态: 无"
+
+            # 历史摘要
+            yield f"执行历史: {len(self.history)} 个条目" if self.history else "执行历史: 无"
+
+        return "\n\n".join(_parts())
 
     def _summarize_result(self, result: Any) -> str:
         """创建结果的简短摘要。"""
         if isinstance(result, dict):
-            # 提取关键信息
-            keys = list(result.keys())
-            return f"字典 ({len(keys)} 个键: {', '.join(keys[:3])}{'...' if len(keys) > 3 else ''})"
+            # islice只取前3个键，不为大字典物化完整键列表
+            head = ', '.join(itertools.islice(result, 3))
+            return f"字典 ({len(result)} 个键: {head}{'...' if len(result) > 3 else ''})"
         elif isinstance(result, list):
             return f"列表 ({len(result)} 项)"
         elif isinstance(result, str):
@@ -225,8 +399,7 @@ class WorkflowMemory(Memory):
         self.add({
             "type": "step_result",
             "step_name": step_name,
-            "result": result,
-            "timestamp": datetime.now().isoformat()
+            "result": result
         })
 
     def update_state(self, key: str, value: Any) -> None:
@@ -240,10 +413,31 @@ class WorkflowMemory(Memory):
         self.add({
             "type": "state_update",
             "key": key,
-            "value": value,
-            "timestamp": datetime.now().isoformat()
+            "value": value
         })
 
+    def update_state_bulk(self, updates: Dict[str, Any]) -> None:
+        """
+        批量更新工作流状态。
+
+        工作流侧把循环体内的状态读写落在本地快照上，迭代边界
+        才一次性提交；状态整批合并，历史只记一条汇总条目，
+        取代逐键update_state的重复add()往返。
+
+        Args:
+            updates: 要合并进状态的键值字典
+        """
+        if not updates:
+            return
+
+        self.state.update(updates)
+        self.history.append(_HistoryEntry(
+            ts=time.time(),
+            type="state_update",
+            state_key=", ".join(updates),
+            value_summary=f"批量更新 {len(updates)} 个状态键"))
+        logging.debug("%s 内存: 已批量更新 %d 个状态键", self.workflow_name, len(updates))
+
     def get_latest_result(self, step_name: str) -> Optional[Any]:
         """
         获取步骤的最新结果。
@@ -254,9 +448,12 @@ class WorkflowMemory(Memory):
         Returns:
             最新结果，如果步骤不存在则返回None
         """
-        if step_name not in self.steps or not self.steps[step_name]:
-            return None
-        return self.steps[step_name][-1]
+        if step_name in self._latest:
+            return self._latest[step_name]
+        # 内存无结果时回退磁盘：上一会话持久化的最新结果仍可复用
+        if self._disk is not None:
+            return self._disk.get(self._disk_key(step_name, "latest"))
+        return None
 
     def get_all_results(self, step_name: str) -> List[Any]:
         """
@@ -268,7 +465,8 @@ class WorkflowMemory(Memory):
         Returns:
             结果列表，如果步骤不存在则返回空列表
         """
-        return self.steps.get(step_name, [])
+        results_arr = self._results
+        return [results_arr[i] for i in self._step_idx.get(step_name, ())]
 
     def get_state(self, key: str, default: Any = None) -> Any:
         """
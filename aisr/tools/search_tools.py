@@ -3,207 +3,86 @@
 
 包含两个原子功能(web_api和web_crawler)以及一个复合功能(web_search)。
 """
-import json
+import collections
+import concurrent.futures
 import os
+import re
 import requests
 import logging
+import threading
 from typing import Dict, Any, List
 import time
 from urllib.parse import urlparse
 from aisr.utils.config import config
+from aisr.utils import json_utils
 
 
 from aisr.utils import logging_utils
 logger = logging_utils.get_logger(__name__, color="blue")
 
-class SearchTools:
-    """
-    搜索工具类，提供网络搜索和内容爬取功能。
-    """
-
-    @staticmethod
-    def web_api(query: str, max_results: int = 5) -> List[Dict[str, Any]]:
-        """
-        执行Web搜索API调用，获取搜索结果。
-
-        Args:
-            query: 搜索查询
-            max_results: 最大结果数量，默认5条
-
-        Returns:
-            搜索结果列表，每个结果包含标题、摘要和链接
-        """
-        logger.info(f"正在搜索: {query}")
-        try:
-            # 设置Bing搜索API环境变量
-            os.environ["BING_SUBSCRIPTION_KEY"] = config.get("api_keys").get("bing_search",os.environ.get("BING_SUBSCRIPTION_KEY"))
-            os.environ["BING_SEARCH_URL"] = config.get("api_keys").get("bing_search_url","https://api.bing.microsoft.com/v7.0/search")
-
-            # 导入Bing搜索包装器
-            from langchain_community.utilities import BingSearchAPIWrapper
-            search = BingSearchAPIWrapper()
-
-            # 执行搜索
-            results = search.results(query, max_results)
-
-            # 格式化结果
-            formatted_results = []
-            for result in results:
-                formatted_result = {
-                    "title": result.get("title", ""),
-                    "snippet": result.get("snippet", ""),
-                    "link": result.get("link", ""),
-                    "query": query
-                }
-                formatted_results.append(formatted_result)
-
-            logger.info(f"搜索结果: {formatted_results}")
-            return formatted_results
-
-        except Exception as e:
-            logger.error(f"Web API搜索错误: {str(e)}")
-            return [{"error": str(e), "query": query}]
-
-    @staticmethod
-    def web_crawler(url: str) -> Dict[str, Any]:
-        """
-        爬取指定URL的网页内容。
-
-        Args:
-            url: 要爬取的网页URL
-
-        Returns:
-            包含页面标题和内容的字典
-        """
-        logger.info(f"正在爬取: {url}")
-        try:
-            # 使用Jina AI的网页渲染服务
-            jina_url = f"https://r.jina.ai/{url}"
-            jian_api = config.get("api_keys").get("jina")
-            headers = {
-                "Authorization": f"Bearer {jian_api}"
-            }
-
-            # 发送请求
-            response = requests.get(jina_url, headers=headers, timeout=60)
-
-            # 检查响应状态
-            if response.status_code != 200:
-                return {
-                    "url": url,
-                    "error": f"HTTP错误: {response.status_code}",
-                    "content": "",
-                    "title": ""
-                }
-
-            # 简单提取标题（实际实现可能需要更复杂的HTML解析）
-            content = response.text
-            temp_dic = {"res":content[:200]+"..."}
-            logger.info(f"爬取结果: {json.dumps(temp_dic,ensure_ascii=False)}")
-            title = ""
-
-            # 非常简单的标题提取
-            title_start = content.find("<title>")
-            title_end = content.find("</title>")
-            if title_start > -1 and title_end > -1:
-                title = content[title_start + 7:title_end].strip()
-
-            return {
-                "url": url,
-                "content": content,
-                "title": title
-            }
-
-        except Exception as e:
-            logger.error(f"网页爬取错误 ({url}): {str(e)}")
-            return {
-                "url": url,
-                "error": str(e),
-                "content": "",
-                "title": ""
-            }
-
-    @staticmethod
-    def web_search(query: str, max_results: int = 1) -> Dict[str, Any]:
-        """
-        执行综合Web搜索，包括搜索和内容爬取。
-
-        Args:
-            query: 搜索查询
-            max_results: 最大结果数量，默认5条
-
-        Returns:
-            包含搜索结果和爬取内容的字典
-        """
-        try:
-            # 1. 执行初步搜索
-            search_results = SearchTools.web_api(query, max_results)
-
-            # 记录初步搜索完成
-            logger.info(f"搜索完成: '{query}'，获取了{len(search_results)}条结果")
-
-            # 2. 爬取每个搜索结果的内容
-            results = []
-            for idx,result in enumerate(search_results):
-                logger.info(f"结果{idx+1}:{result}")
-                # 获取URL
-                url = result.get("link", "")
-
-                # 爬取内容
-                try:
-                    if url and config.get("runtime_parameters").get("enable_crawler",True):
-                        # 提取有效URL
-                        parsed_url = urlparse(url)
-                        if not parsed_url.scheme or not parsed_url.netloc:
-                            logger.warning(f"无效URL: {url}")
-                            continue
-
-                        # 添加延迟以避免请求过快
-                        time.sleep(2)
-
-                        # 执行爬取
-                        crawl_result = SearchTools.web_crawler(url)
-                    else:
-                        crawl_result = {}
-
-                    # 合并搜索结果和爬取内容
-                    combined_result = {
-                        **result,
-                        "content": crawl_result.get("content", ""),
-                        "is_crawled": True,
-                        "crawl_error": crawl_result.get("error", "")
-                    }
-
-                    results.append(combined_result)
-
-                except Exception as e:
-                    logger.error(f"爬取过程中出错 ({url}): {str(e)}")
-                    # 添加错误信息，但仍然包含搜索结果
-                    result["is_crawled"] = False
-                    result["crawl_error"] = str(e)
-                    results.append(result)
-
-            return {
-                "query": query,
-                "results": results,
-                "result_count": len(results),
-                "has_error": any(r.get("crawl_error", "") for r in results)
-            }
-
-        except Exception as e:
-            logger.error(f"综合搜索错误: {str(e)}")
-            return {
-                "query": query,
-                "error": str(e),
-                "results": [],
-                "result_count": 0,
-                "has_error": True
-            }
-
-
-# 单独函数版本（如果不想使用类）
-
-def web_api(query: str, max_results: int = 1) -> List[Dict[str, Any]]:
+# 爬取阶段的线程数上限：每次抓取是纯网络等待，线程可以重叠这些等待
+_CRAWL_MAX_WORKERS = config.get("runtime_parameters").get("crawl_max_workers", 8)
+
+# 模块级共享Session：每次requests.get都要重付TCP+TLS握手
+# （约100-300ms），而爬取几乎总是打向同一主机(r.jina.ai)；
+# 带连接池的Session通过keep-alive跨调用复用连接，且线程安全，
+# 与上面的线程池爬取天然配合
+_SESSION = requests.Session()
+_ADAPTER = requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=32)
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
+
+# 每主机并发上限：以按netloc划分的信号量代替全局sleep(2)节流，
+# 对同一主机保持礼貌的同时，不同主机的抓取完全并行
+_HOST_LIMITS = collections.defaultdict(lambda: threading.Semaphore(2))
+_HOST_LIMITS_LOCK = threading.Lock()
+
+# 标题提取的预编译正则：单遍扫描且只看页面开头，
+# 避免str.find对超大HTML做两次全文线性扫描
+_TITLE_RE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+# <title>几乎总在<head>内，扫描前8KB足够
+_TITLE_SCAN_LIMIT = 8192
+
+# 单次爬取保留的内容上限：下游只消费标题和开头若干KB，
+# 截断后每次爬取的内存占用从最大数MB收敛到固定256KB，
+# 也减轻结果进入WorkflowMemory.steps后的累积内存压力
+_CRAWL_MAX_BYTES = 256 * 1024
+
+
+# Bing搜索包装器单例：langchain首次导入极重（数百ms），
+# 且包装器构造每次都重走环境变量解析；延迟到首次搜索时构建一次
+_bing_search = None
+_bing_search_lock = threading.Lock()
+
+
+def _get_bing_search():
+    """获取（必要时构建）模块级的Bing搜索包装器单例。"""
+    global _bing_search
+    if _bing_search is None:
+        with _bing_search_lock:
+            if _bing_search is None:
+                # 环境变量只在首次构建时设置一次
+                os.environ["BING_SUBSCRIPTION_KEY"] = config.get("api_keys").get(
+                    "bing_search", os.environ.get("BING_SUBSCRIPTION_KEY"))
+                os.environ["BING_SEARCH_URL"] = config.get("api_keys").get(
+                    "bing_search_url", "https://api.bing.microsoft.com/v7.0/search")
+
+                # 导入Bing搜索包装器
+                from langchain_community.utilities import BingSearchAPIWrapper
+                _bing_search = BingSearchAPIWrapper()
+    return _bing_search
+
+
+def _crawl_with_throttle(url: str) -> Dict[str, Any]:
+    """在所属主机的并发限额内执行一次爬取。"""
+    host = urlparse(url).netloc
+    with _HOST_LIMITS_LOCK:
+        semaphore = _HOST_LIMITS[host]
+    with semaphore:
+        return web_crawler(url)
+
+
+def web_api(query: str, max_results: int = 5) -> List[Dict[str, Any]]:
     """
     执行Web搜索API调用，获取搜索结果。
 
@@ -214,7 +93,31 @@ def web_api(query: str, max_results: int = 1) -> List[Dict[str, Any]]:
     Returns:
         搜索结果列表，每个结果包含标题、摘要和链接
     """
-    return SearchTools.web_api(query, max_results)
+    logger.info("正在搜索: %s", query)
+    try:
+        # 复用模块级单例，不再每次调用都重建包装器
+        search = _get_bing_search()
+
+        # 执行搜索
+        results = search.results(query, max_results)
+
+        # 格式化结果
+        formatted_results = []
+        for result in results:
+            formatted_result = {
+                "title": result.get("title", ""),
+                "snippet": result.get("snippet", ""),
+                "link": result.get("link", ""),
+                "query": query
+            }
+            formatted_results.append(formatted_result)
+
+        logger.info("搜索结果: %s", formatted_results)
+        return formatted_results
+
+    except Exception as e:
+        logger.error("Web API搜索错误: %s", e)
+        return [{"error": str(e), "query": query}]
 
 
 def web_crawler(url: str) -> Dict[str, Any]:
@@ -227,7 +130,63 @@ def web_crawler(url: str) -> Dict[str, Any]:
     Returns:
         包含页面标题和内容的字典
     """
-    return SearchTools.web_crawler(url)
+    logger.info("正在爬取: %s", url)
+    try:
+        # 使用Jina AI的网页渲染服务
+        jina_url = f"https://r.jina.ai/{url}"
+        jian_api = config.get("api_keys").get("jina")
+        headers = {
+            "Authorization": f"Bearer {jian_api}"
+        }
+
+        # 流式请求：不把整个响应体一次性读入内存
+        response = _SESSION.get(jina_url, headers=headers, timeout=60, stream=True)
+
+        # 检查响应状态
+        if response.status_code != 200:
+            response.close()
+            return {
+                "url": url,
+                "error": f"HTTP错误: {response.status_code}",
+                "content": "",
+                "title": ""
+            }
+
+        # 只读取上限以内的字节，超出部分直接丢弃并提前断开
+        chunks = []
+        read = 0
+        for chunk in response.iter_content(chunk_size=16384):
+            chunks.append(chunk)
+            read += len(chunk)
+            if read >= _CRAWL_MAX_BYTES:
+                break
+        encoding = response.encoding or "utf-8"
+        response.close()
+        content = b"".join(chunks)[:_CRAWL_MAX_BYTES].decode(encoding, errors="replace")
+
+        # 预览串只在DEBUG真正启用时才构建；序列化走json_utils
+        # （orjson可用时为C实现，回退标准库）
+        if logger.isEnabledFor(logging.DEBUG):
+            temp_dic = {"res": content[:200] + "..."}
+            logger.debug("爬取结果: %s", json_utils.dumps(temp_dic))
+        # 非常简单的标题提取：单次正则搜索，且只扫描页面开头
+        m = _TITLE_RE.search(content, 0, _TITLE_SCAN_LIMIT)
+        title = m.group(1).strip() if m else ""
+
+        return {
+            "url": url,
+            "content": content,
+            "title": title
+        }
+
+    except Exception as e:
+        logger.error("网页爬取错误 (%s): %s", url, e)
+        return {
+            "url": url,
+            "error": str(e),
+            "content": "",
+            "title": ""
+        }
 
 
 def web_search(query: str, max_results: int = 1) -> Dict[str, Any]:
@@ -241,4 +200,80 @@ def web_search(query: str, max_results: int = 1) -> Dict[str, Any]:
     Returns:
         包含搜索结果和爬取内容的字典
     """
-    return SearchTools.web_search(query, max_results)
\ No newline at end of file
+    try:
+        # 1. 执行初步搜索
+        search_results = web_api(query, max_results)
+
+        # 记录初步搜索完成
+        logger.info("搜索完成: '%s'，获取了%d条结果", query, len(search_results))
+
+        # 2. 筛选待爬取的URL（保持结果顺序）
+        crawl_enabled = config.get("runtime_parameters").get("enable_crawler", True)
+        entries = []  # (搜索结果, 待爬取URL或None)
+        for idx, result in enumerate(search_results):
+            logger.info("结果%d:%s", idx + 1, result)
+            url = result.get("link", "")
+
+            if url and crawl_enabled:
+                # 廉价前缀检查代替urlparse：带scheme和主机的链接
+                # 必以http(s)://开头，完整解析推迟到真正爬取时
+                # 按netloc分组节流的那一次
+                if not url.startswith(("http://", "https://")):
+                    logger.warning("无效URL: %s", url)
+                    continue
+                entries.append((result, url))
+            else:
+                entries.append((result, None))
+
+        # 3. 并发爬取：抓取是纯网络等待，线程池把逐条串行
+        # （外加每条2秒的人为停顿）的墙钟时间压缩到最慢一次请求；
+        # 对同一主机的礼貌性节流由_crawl_with_throttle的信号量保证
+        urls_to_crawl = [url for _, url in entries if url]
+        crawl_results = {}
+        if urls_to_crawl:
+            max_workers = min(_CRAWL_MAX_WORKERS, len(urls_to_crawl))
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for url, crawl_result in zip(urls_to_crawl,
+                                             executor.map(_crawl_with_throttle, urls_to_crawl)):
+                    crawl_results[url] = crawl_result
+
+        # 4. 按原顺序合并搜索结果和爬取内容
+        results = []
+        for result, url in entries:
+            crawl_result = crawl_results.get(url, {}) if url else {}
+            results.append({
+                **result,
+                "content": crawl_result.get("content", ""),
+                "is_crawled": True,
+                "crawl_error": crawl_result.get("error", "")
+            })
+
+        return {
+            "query": query,
+            "results": results,
+            "result_count": len(results),
+            "has_error": any(r.get("crawl_error", "") for r in results)
+        }
+
+    except Exception as e:
+        logger.error("综合搜索错误: %s", e)
+        return {
+            "query": query,
+            "error": str(e),
+            "results": [],
+            "result_count": 0,
+            "has_error": True
+        }
+
+
+class SearchTools:
+    """
+    搜索工具类，提供网络搜索和内容爬取功能。
+
+    实现已移至模块级函数（最廉价的查找路径），
+    此处仅作为向后兼容的命名空间。
+    """
+
+    web_api = staticmethod(web_api)
+    web_crawler = staticmethod(web_crawler)
+    web_search = staticmethod(web_search)
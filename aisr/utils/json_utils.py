@@ -0,0 +1,63 @@
+"""
+JSON工具模块，优先使用orjson进行解析和序列化。
+
+orjson是C实现的JSON库，对LLM响应这类10-100KB的负载，解析速度
+显著快于标准库json。orjson为可选依赖，未安装时自动回退到标准库，
+调用方无需感知差异。
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(text):
+    """
+    解析JSON字符串为Python对象。
+
+    Args:
+        text: JSON字符串或字节串
+
+    Returns:
+        解析后的Python对象
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def dumps(obj) -> str:
+    """
+    将Python对象序列化为JSON字符串。
+
+    Args:
+        obj: 待序列化的Python对象
+
+    Returns:
+        JSON字符串
+    """
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def dumps_canonical(obj) -> bytes:
+    """
+    将Python对象序列化为规范化JSON字节串（键排序，未知类型转str）。
+
+    供缓存键计算等需要稳定序列化的场景使用：相同内容无论键序
+    如何都产生相同字节。直接返回字节串，省去哈希前的再编码。
+
+    Args:
+        obj: 待序列化的Python对象
+
+    Returns:
+        规范化JSON的UTF-8字节串
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, sort_keys=True, ensure_ascii=False,
+                      default=str).encode("utf-8")
@@ -1,7 +1,6 @@
 """工作流组件"""
 
 from aisr.workflows.base import Workflow
-from aisr.workflows.task_planning import TaskPlanningWorkflow
-from aisr.workflows.search_planning import SearchPlanningWorkflow
-from aisr.workflows.sub_answer import SubAnswerWorkflow
 from aisr.workflows.research import ResearchWorkflow
+from aisr.workflows.search_sub_answer_executing import SearchSubAnswerExecutingWorkflow
+from aisr.workflows.task_executing_search_planning import TaskExecutingSearchPlanningWorkflow
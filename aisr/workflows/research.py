@@ -0,0 +1,485 @@
+"""
+研究工作流模块，协调整个研究过程。
+
+实现最外层任务规划循环，负责整体研究流程控制。
+"""
+
+import concurrent.futures
+import hashlib
+import logging
+import time
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+
+from aisr.workflows.base import Workflow
+from aisr.utils import json_utils
+
+# 研究步骤攒批上限与最大滞留时间：全局历史的记录改为批量提交，
+# 组件往返次数约减半
+_STEP_BUFFER_LIMIT = 16
+_STEP_FLUSH_SECONDS = 1.0
+
+# 复杂度到最大规划迭代次数的查找表；未知复杂度按complex处理
+_MAX_ITERATIONS = {"simple": 1, "medium": 2, "complex": 3}
+
+
+class ResearchWorkflow(Workflow):
+    """
+    主研究工作流，实现最外层任务规划循环。
+
+    负责整体研究方向把控，包括任务规划、执行结果评估、
+    重规划决策和最终答案生成。不涉及具体任务执行细节。
+    洞察、答案规划等代理调用按输入内容做了备忘缓存：最后一轮
+    迭代若未产出新的子回答，收尾的洞察生成与迭代内的那次
+    输入完全相同，可直接复用，省下一整次LLM往返。
+    """
+
+    def __init__(self, router, memory):
+        """
+        初始化研究工作流。
+
+        Args:
+            router: 用于调用其他组件的路由器
+            memory: 工作流的内存系统
+        """
+        super().__init__(router, memory)
+        # 代理调用的内容寻址备忘 {标签:参数指纹 -> 结果}
+        self._memo: Dict[str, Any] = {}
+        # 待提交到全局研究历史的步骤缓冲
+        self._pending_steps: List[Dict[str, Any]] = []
+        self._last_step_flush = time.monotonic()
+        # 增量洞察状态：上次洞察结果与已送入分析的任务id集合
+        self._last_insights: Optional[Dict[str, Any]] = None
+        self._insight_task_ids: set = set()
+
+    def _memoized_call(self, tag: str, function: str,
+                       parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        按参数内容缓存的组件调用。
+
+        相同输入的代理调用是确定性开销（一次完整的LLM往返），
+        以参数的规范化哈希为键短路重复调用。
+
+        Args:
+            tag: 缓存命名空间（区分不同代理调用）
+            function: 组件函数路径
+            parameters: 调用参数
+
+        Returns:
+            组件调用结果（命中时为此前的结果对象）
+        """
+        fingerprint = hashlib.blake2b(json_utils.dumps_canonical(parameters),
+                                      digest_size=16).hexdigest()
+        key = f"{tag}:{fingerprint}"
+        if key in self._memo:
+            logging.debug(f"研究工作流: '{tag}' 命中备忘缓存")
+            return self._memo[key]
+
+        result = self.call_component(function, parameters)
+        self._memo[key] = result
+        return result
+
+    def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        执行最外层研究规划循环。
+
+        Args:
+            context: 包含研究查询的上下文
+                - query: 研究查询
+
+        Returns:
+            最终研究结果
+        """
+        query = context.get("query")
+        if not query:
+            error_msg = "缺少研究查询"
+            logging.error(error_msg)
+            return {"error": error_msg}
+
+        logging.info(f"开始研究工作流: '{query}'")
+
+        # 本地状态快照：循环体内的状态读写都落在这个字典上，
+        # 迭代边界才经update_state_bulk整批刷入工作流内存，
+        # 省去热路径上逐键的内存往返与历史记录
+        state = {
+            "query": query,
+            "start_time": datetime.now().isoformat(),
+            "current_planning_iteration": 0,
+            "sub_answers": {}
+        }
+
+        try:
+            # 记录研究开始
+            self._record_step("research_started", {
+                "query": query,
+                "timestamp": datetime.now().isoformat()
+            })
+
+            # 首轮预热并行：复杂度估计与第一轮任务规划都只依赖query、
+            # 互不依赖，两次LLM调用并发发出，启动阶段的关键路径
+            # 从两次往返之和收敛到较慢的一次
+            with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+                complexity_future = executor.submit(self._estimate_initial_complexity, query)
+                first_plan_future = executor.submit(
+                    self.call_component, "task_plan_agent.plan_research", {"query": query})
+                complexity = complexity_future.result()
+            max_planning_iterations = self._get_max_iterations(complexity)
+            state["complexity"] = complexity
+            state["max_planning_iterations"] = max_planning_iterations
+            self.memory.update_state_bulk(state)
+
+            # ======== 任务规划循环（最外层循环）========
+            current_planning_iteration = 0
+            accumulated_sub_answers = {}  # 累积所有子回答
+
+            while current_planning_iteration < max_planning_iterations:
+                iteration_number = current_planning_iteration + 1
+                logging.info(f"开始任务规划迭代 {iteration_number}/{max_planning_iterations}")
+                state["current_planning_iteration"] = iteration_number
+
+                # 记录规划迭代开始
+                self._record_step("planning_iteration_started", {
+                    "iteration": iteration_number,
+                    "max_iterations": max_planning_iterations
+                })
+
+                # 1. 任务规划阶段 - 生成/重新规划研究任务
+                if current_planning_iteration == 0:
+                    # 首轮规划已在预热阶段并发发出，这里直接取结果
+                    task_plan = first_plan_future.result()
+                else:
+                    # 重规划：附带前一轮的计划与已有子回答
+                    task_plan = self.call_component("task_plan_agent.plan_research", {
+                        "query": query,
+                        "previous_plan": self.memory.get_latest_result("task_planning"),
+                        "previous_answers": accumulated_sub_answers
+                    })
+                self.memory.save_result("task_planning", task_plan)
+
+                # 获取子任务列表
+                sub_tasks = task_plan.get("sub_tasks", [])
+                state["sub_tasks"] = sub_tasks
+
+                # 更新复杂度（如有变化）
+                complexity = task_plan.get("complexity", complexity)
+                state["complexity"] = complexity
+
+                # 2. 任务执行阶段 - 将任务委托给任务执行工作流
+                # 任务执行工作流负责搜索规划和搜索执行
+                execution_result = self.call_component("task_executing_search_planning.execute", {
+                    "query": query,
+                    "sub_tasks": sub_tasks,
+                    "previous_answers": accumulated_sub_answers
+                })
+
+                # 获取本轮执行结果并累积
+                iteration_answers = execution_result.get("sub_answers", {})
+                accumulated_sub_answers.update(iteration_answers)
+
+                # 记录本轮迭代结果
+                self.memory.save_result(f"iteration_answers_{iteration_number}", iteration_answers)
+                state["sub_answers"] = accumulated_sub_answers
+
+                # 3. 洞察生成 - 分析当前研究进展。已到最后一轮时跳过：
+                # _needs_more_research在该轮必然返回False，洞察不参与
+                # 停止决策，统一留给循环后的final_insights一次生成
+                at_max_iterations = current_planning_iteration >= max_planning_iterations - 1
+                insights = None
+                if not at_max_iterations:
+                    insights = self._generate_insights(query, accumulated_sub_answers)
+                    self.memory.save_result(f"insights_iteration_{iteration_number}", insights)
+
+                # 记录规划迭代完成
+                self._record_step("planning_iteration_completed", {
+                    "iteration": iteration_number,
+                    "new_sub_answers": len(iteration_answers),
+                    "total_sub_answers": len(accumulated_sub_answers)
+                })
+
+                # 迭代边界：本地快照整批刷入工作流内存
+                self.memory.update_state_bulk(state)
+
+                # 4. 决策阶段 - 确定是否需要继续规划迭代
+                # 检查是否需要继续研究（基于洞察）
+                if at_max_iterations or not self._needs_more_research(
+                        insights, current_planning_iteration, max_planning_iterations):
+                    logging.info("研究目标已满足，不需要更多规划迭代")
+                    break
+
+                # 考虑用户交互
+                if self._should_interact_with_user(current_planning_iteration, complexity):
+                    user_feedback = self._request_user_feedback("规划迭代", {
+                        "iteration": iteration_number,
+                        "max_iterations": max_planning_iterations,
+                        "insights_summary": self._summarize_insights(insights)
+                    })
+
+                    if not self._should_continue_based_on_feedback(user_feedback):
+                        logging.info("根据用户反馈停止规划迭代")
+                        break
+
+                # 准备下一轮规划迭代
+                current_planning_iteration += 1
+
+            # ======== 答案生成阶段 ========
+            # 使用累积的子回答生成最终答案
+            final_insights = self._generate_insights(query, accumulated_sub_answers)
+
+            # 规划答案结构并生成最终答案（融合为一次调用）
+            final_answer = self._plan_and_generate_answer(
+                query, accumulated_sub_answers, final_insights)
+
+            # 记录研究完成
+            self._record_step("research_completed", {
+                "query": query,
+                "planning_iterations": current_planning_iteration + 1,
+                "sub_tasks_completed": len(accumulated_sub_answers),
+                "end_time": datetime.now().isoformat()
+            })
+
+            return final_answer
+
+        except Exception as e:
+            logging.error(f"研究工作流执行错误: {str(e)}")
+            # 记录错误
+            self._record_step("research_error", {
+                "query": query,
+                "error": str(e),
+                "timestamp": datetime.now().isoformat()
+            })
+
+            return {
+                "error": f"研究执行失败: {str(e)}",
+                "query": query,
+                "partial_results": state.get("sub_answers", {})
+            }
+
+        finally:
+            # 无论成功或失败，缓冲中的步骤都提交到全局历史
+            self._flush_steps()
+
+    def _estimate_initial_complexity(self, query: str) -> str:
+        """
+        初步估计查询复杂度，用于设置初始迭代次数。
+
+        Args:
+            query: 研究查询
+
+        Returns:
+            复杂度评估: "simple", "medium", 或 "complex"
+        """
+        # 经由工作流内存的结果缓存调用任务规划代理：相同查询
+        # （归一化大小写与首尾空白后）在进程内直接命中指纹缓存，
+        # 开启磁盘持久化时还可跨会话复用，均省下一次LLM往返
+        result = self.memory.get_or_compute(
+            "complexity_estimate",
+            {"query": query.strip().lower()},
+            lambda: self.call_component("task_plan_agent.estimate_complexity", {
+                "query": query
+            }))
+
+        complexity = result.get("complexity", "medium")
+        logging.info(f"初步复杂度评估: {complexity}")
+
+        return complexity
+
+    def _generate_insights(self, query: str, sub_answers: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        生成研究洞察，评估当前研究进展。
+
+        Args:
+            query: 研究查询
+            sub_answers: 累积的子回答集合
+
+        Returns:
+            研究洞察
+        """
+        # 子回答集无增量时直接复用上次洞察：收尾的final_insights
+        # 在最后一轮未新增回答时完全免去一次LLM往返
+        new_ids = [tid for tid in sub_answers if tid not in self._insight_task_ids]
+        if self._last_insights is not None and not new_ids:
+            logging.debug("研究工作流: 子回答无增量，复用上次洞察")
+            return self._last_insights
+
+        parameters = {
+            "query": query,
+            "sub_answers": sub_answers
+        }
+        # 增量模式：附带上次洞察与新增的子回答，代理只需在
+        # 旧洞察基础上分析增量，而非对全量回答从头生成
+        if self._last_insights is not None:
+            parameters["previous_insights"] = self._last_insights
+            parameters["new_sub_answers"] = {tid: sub_answers[tid] for tid in new_ids}
+
+        result = self._memoized_call("insights", "insight_agent.analyze_results", parameters)
+        self._last_insights = result
+        self._insight_task_ids = set(sub_answers)
+        return result
+
+    def _plan_and_generate_answer(self, query: str, sub_answers: Dict[str, Any],
+                                  insights: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        规划答案结构并生成最终答案。
+
+        规划与生成背靠背执行且中间没有决策点，拆成两次调用时
+        各自都要重发全部子回答（载荷的主体）；融合成一次
+        plan_and_generate调用，省下一次LLM往返与重复传输。
+
+        Args:
+            query: 研究查询
+            sub_answers: 子回答集合
+            insights: 研究洞察
+
+        Returns:
+            最终答案（复合结果中的answer部分）
+        """
+        # 调用答案代理的融合接口（输入未变化时复用）
+        result = self._memoized_call("answer", "answer_agent.plan_and_generate", {
+            "query": query,
+            "sub_answers": sub_answers,
+            "insights": insights
+        })
+
+        # 复合结果缺少answer时（如路由失败）原样返回以传播错误
+        if "answer" not in result:
+            return result
+
+        self.memory.save_result("answer_plan", result.get("plan"))
+        self.memory.save_result("final_answer", result["answer"])
+        return result["answer"]
+
+    def _get_max_iterations(self, complexity: str) -> int:
+        """基于复杂度确定最大迭代次数（模块级查找表，单次哈希查找）。"""
+        return _MAX_ITERATIONS.get(complexity, 3)
+
+    def _needs_more_research(self, insights: Dict[str, Any], current_iteration: int, max_iterations: int) -> bool:
+        """
+        确定是否需要更多规划迭代，基于研究洞察。
+
+        Args:
+            insights: 当前的研究洞察
+            current_iteration: 当前迭代索引
+            max_iterations: 最大迭代次数
+
+        Returns:
+            是否需要继续研究
+        """
+        # 如果已达到最大迭代次数
+        if current_iteration >= max_iterations - 1:
+            return False
+
+        # 检查未回答的问题
+        unanswered_questions = insights.get("unanswered_questions", [])
+        if len(unanswered_questions) > 1:
+            return True
+
+        # 检查分歧点
+        areas_of_disagreement = insights.get("areas_of_disagreement", [])
+        if len(areas_of_disagreement) > 1:
+            return True
+
+        # 检查意外发现
+        unexpected_findings = insights.get("unexpected_findings", [])
+        if len(unexpected_findings) > 0 and current_iteration < 1:
+            return True
+
+        # 默认不需要更多研究
+        return False
+
+    def _should_interact_with_user(self, current_iteration: int, complexity: str) -> bool:
+        """
+        确定是否应该与用户交互，基于迭代和复杂度。
+
+        Args:
+            current_iteration: 当前迭代索引
+            complexity: 研究复杂度
+
+        Returns:
+            是否应该交互
+        """
+        if complexity == "complex":
+            return True  # 复杂查询总是请求用户反馈
+        elif complexity == "medium" and current_iteration >= 1:
+            return True  # 中等复杂度在第一次迭代后请求反馈
+
+        return False
+
+    def _request_user_feedback(self, interaction_point: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        请求用户反馈（模拟）。
+
+        在实际实现中，这将调用UI组件或API来获取用户输入。
+        这里我们提供一个简单的模拟实现。
+        """
+        # 记录交互点
+        self._record_step("user_interaction_requested", {
+            "interaction_point": interaction_point,
+            "context": context
+        })
+
+        # 模拟用户反馈 - 在实际实现中应替换为真实交互
+        return {
+            "continue": True,
+            "feedback": "继续研究",
+            "timestamp": datetime.now().isoformat()
+        }
+
+    def _should_continue_based_on_feedback(self, feedback: Dict[str, Any]) -> bool:
+        """根据用户反馈决定是否继续研究。"""
+        return feedback.get("continue", True)
+
+    def _record_step(self, step_name: str, data: Dict[str, Any]) -> None:
+        """
+        记录研究步骤。
+
+        工作流内存立即写入（供本次运行随时读取）；全局研究历史
+        攒批提交，缓冲满16条或滞留超1秒时整批发出。
+        """
+        # 保存到工作流内存
+        self.memory.save_result(step_name, data)
+
+        # 缓冲全局历史记录，延迟批量提交；时间戳优先复用载荷里
+        # 已格式化的，每个步骤只做一次datetime分配与格式化
+        self._pending_steps.append({
+            "step_name": step_name,
+            "data": data,
+            "timestamp": data.get("timestamp") or datetime.now().isoformat()
+        })
+
+        if (len(self._pending_steps) >= _STEP_BUFFER_LIMIT
+                or time.monotonic() - self._last_step_flush >= _STEP_FLUSH_SECONDS):
+            self._flush_steps()
+
+    def _flush_steps(self) -> None:
+        """把缓冲的研究步骤批量提交到全局研究历史。"""
+        self._last_step_flush = time.monotonic()
+        if not self._pending_steps:
+            return
+
+        batch, self._pending_steps = self._pending_steps, []
+        try:
+            self.call_component("memory_manager.record_research_steps", {
+                "steps": batch
+            })
+        except ValueError:
+            # 批量接口不可用（旧版内存管理器）时逐条回退，保证历史不丢
+            for step in batch:
+                self.call_component("memory_manager.record_research_step", {
+                    "step_name": step["step_name"],
+                    "data": step["data"]
+                })
+
+    def _summarize_insights(self, insights: Dict[str, Any]) -> str:
+        """创建洞察的简短摘要。"""
+        # 表驱动的各段以生成器惰性产出并一次join，每个键只做
+        # 一次字典访问，不再"in检查+取值"各查一遍
+        def _lines():
+            yield "研究洞察摘要:"
+            for label, key, limit in (("主题", "key_themes", 3),
+                                      ("未回答问题", "unanswered_questions", 2),
+                                      ("意外发现", "unexpected_findings", 2)):
+                values = insights.get(key)
+                if values:
+                    yield f"{label}: {', '.join(values[:limit])}"
+
+        return "\n".join(_lines())
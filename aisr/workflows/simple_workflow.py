@@ -8,6 +8,7 @@ import os
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
 sys.path.append(project_root)
 
+import asyncio
 import logging
 from typing import Dict, Any, List, Optional
 import time
@@ -20,12 +21,32 @@ from aisr.agents.answer_plan import AnswerPlanAgent
 from aisr.agents.answer import AnswerAgent
 from aisr.tools.search_tools import web_search
 from aisr.core.llm_provider import LLMProvider
+from aisr.utils.config import config
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
 
 def main_workflow(query: str, max_iterations: int = 2) -> Dict[str, Any]:
     """
-    执行完整的AISR研究工作流。
+    执行完整的AISR研究工作流（同步入口）。
+
+    内部以asyncio驱动异步智能体，保持对外接口不变。
+
+    Args:
+        query: 用户研究查询
+        max_iterations: 最大规划迭代次数，默认3次
+
+    Returns:
+        包含最终答案的字典
+    """
+    return asyncio.run(main_workflow_async(query, max_iterations))
+
+
+async def main_workflow_async(query: str, max_iterations: int = 2) -> Dict[str, Any]:
+    """
+    执行完整的AISR研究工作流（异步实现）。
+
+    异步智能体（洞察、子答案、答案规划、最终答案）通过await调用，
+    使独立的LLM网络等待可以相互重叠。
 
     Args:
         query: 用户研究查询
@@ -56,6 +77,9 @@ def main_workflow(query: str, max_iterations: int = 2) -> Dict[str, Any]:
     task_memory = {}  # 存储每个任务的记忆
     iteration_tasks = {}  # 存储每次迭代的任务
 
+    # 最后一轮提前启动的答案大纲任务（阶梯式流水）
+    early_outline_task = None
+
     # 外层循环：任务规划 -> 执行 -> 洞察 -> 再规划
     for iteration in range(max_iterations):
         logging.info(f"开始规划迭代 {iteration + 1}/{max_iterations}")
@@ -72,7 +96,7 @@ def main_workflow(query: str, max_iterations: int = 2) -> Dict[str, Any]:
             task_plan_context["plan_insights"] = insights
 
         # 执行任务规划
-        task_plan = task_plan_agent.execute(task_plan_context)
+        task_plan = await task_plan_agent.execute(task_plan_context)
         previous_task_plan = task_plan  # 保存，以便下一轮使用
 
         # 获取子任务列表
@@ -91,96 +115,124 @@ def main_workflow(query: str, max_iterations: int = 2) -> Dict[str, Any]:
         current_iteration_tasks = [task.get("id") for task in sub_tasks]
         iteration_tasks[iteration] = current_iteration_tasks
 
-        # 2. 内层循环：执行所有子任务
+        # 2. 内层循环：并发执行所有子任务
+        # 子任务间数据独立（各自拥有独立的search_results），属于rank-0并行，
+        # 通过asyncio.gather并发执行；答案规划与最终答案仍在gather完成后顺序执行。
         iteration_sub_answers = {}
 
-        for task_index, task in enumerate(sub_tasks):
+        # 并发上限，避免触发LLM提供商的速率限制
+        max_concurrency = config.get("runtime_parameters").get("max_concurrent_sub_tasks", 4)
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def execute_sub_task(task: Dict[str, Any]) -> None:
+            """执行单个子任务的搜索规划、搜索与子答案生成。"""
             task_id = task.get("id")
             task_title = task.get("title", "未命名任务")
 
-            logging.info(f"执行子任务 {task_index + 1}/{len(sub_tasks)}: {task_title}")
-
-            # 如果这个任务已有答案(在之前的迭代中)，则跳过
-            if task_id in all_sub_answers:
-                logging.info(f"子任务 '{task_title}' 已有答案，跳过执行")
-                iteration_sub_answers[task_id] = all_sub_answers[task_id]
-                continue
-
-            # 初始化或获取任务记忆
-            if task_id not in task_memory:
-                task_memory[task_id] = {
-                    "search_plans": [],
-                    "search_results": [],
-                    "sub_answers": [],
-                    "iterations": 0
+            async with semaphore:
+                logging.info(f"执行子任务: {task_title}")
+
+                # 初始化或获取任务记忆
+                if task_id not in task_memory:
+                    task_memory[task_id] = {
+                        "search_plans": [],
+                        "search_results": [],
+                        "sub_answers": [],
+                        "iterations": 0
+                    }
+
+                # 2.1 搜索规划
+                # 并发执行下同轮任务互不可见，相关答案取自前序迭代的累积结果
+                search_plan_context = {
+                    "task": task,
+                    "previous_search_plans": task_memory[task_id]["search_plans"],
+                    "related_tasks_answers": dict(all_sub_answers)
                 }
 
-            # 收集相关任务的答案（当前迭代中已完成的任务）
-            related_answers = {}
-            for completed_task_id in iteration_sub_answers:
-                related_answers[completed_task_id] = iteration_sub_answers[completed_task_id]
-
-            # 2.1 搜索规划
-            search_plan_context = {
-                "task": task,
-                "previous_search_plans": task_memory[task_id]["search_plans"],
-                "related_tasks_answers": related_answers
-            }
-
-            # 如果该任务之前有子答案，添加到上下文
-            if task_memory[task_id]["sub_answers"]:
-                search_plan_context["previous_sub_answer"] = task_memory[task_id]["sub_answers"][-1]
+                # 如果该任务之前有子答案，添加到上下文
+                if task_memory[task_id]["sub_answers"]:
+                    search_plan_context["previous_sub_answer"] = task_memory[task_id]["sub_answers"][-1]
 
-            search_plan = search_plan_agent.execute(search_plan_context)
+                search_plan = await search_plan_agent.execute(search_plan_context)
 
-            # 存储搜索计划到任务记忆
-            task_memory[task_id]["search_plans"].append(search_plan)
+                # 存储搜索计划到任务记忆
+                task_memory[task_id]["search_plans"].append(search_plan)
 
-            # 获取搜索查询
-            queries = search_plan.get("queries", [])
-            if not queries:
-                logging.warning(f"子任务 '{task_title}' 没有生成搜索查询，跳过执行")
-                continue
+                # 获取搜索查询
+                queries = search_plan.get("queries", [])
+                if not queries:
+                    logging.warning(f"子任务 '{task_title}' 没有生成搜索查询，跳过执行")
+                    return
 
-            # 2.2 执行搜索
-            all_search_results = []
-            for query_index, query in enumerate(queries[:3]):  # 限制最多使用前3个查询
-                logging.info(f"执行搜索 {query_index + 1}/{min(len(queries), 3)}: '{query}'")
-                search_result = web_search(query)
-                all_search_results.append(search_result)
+                # 2.2 执行搜索
+                all_search_results = []
+                for query_index, search_query in enumerate(queries[:3]):  # 限制最多使用前3个查询
+                    logging.info(f"执行搜索 {query_index + 1}/{min(len(queries), 3)}: '{search_query}'")
+                    search_result = await asyncio.to_thread(web_search, search_query)
+                    all_search_results.append(search_result)
 
-            # 合并所有搜索结果
-            merged_results = {
-                "results": [],
-                "result_count": 0
-            }
+                # 合并所有搜索结果
+                merged_results = {
+                    "results": [],
+                    "result_count": 0
+                }
 
-            for result in all_search_results:
-                merged_results["results"].extend(result.get("results", []))
+                for result in all_search_results:
+                    merged_results["results"].extend(result.get("results", []))
 
-            merged_results["result_count"] = len(merged_results["results"])
+                merged_results["result_count"] = len(merged_results["results"])
 
-            # 存储搜索结果到任务记忆
-            task_memory[task_id]["search_results"].append(merged_results)
+                # 存储搜索结果到任务记忆
+                task_memory[task_id]["search_results"].append(merged_results)
 
-            # 2.3 生成子答案
-            sub_answer_context = {
-                "task": task,
-                "search_results": merged_results
-            }
+                # 2.3 生成子答案
+                sub_answer_context = {
+                    "task": task,
+                    "search_results": merged_results
+                }
 
-            sub_answer = sub_answer_agent.execute(sub_answer_context)
-            answer_text = sub_answer.get("answer", "")
+                sub_answer = await sub_answer_agent.execute(sub_answer_context)
+                answer_text = sub_answer.get("answer", "")
 
-            # 保存子答案
-            iteration_sub_answers[task_id] = answer_text
+                # 保存子答案
+                iteration_sub_answers[task_id] = answer_text
 
-            # 更新任务记忆
-            task_memory[task_id]["sub_answers"].append(answer_text)
-            task_memory[task_id]["iterations"] += 1
+                # 更新任务记忆
+                task_memory[task_id]["sub_answers"].append(answer_text)
+                task_memory[task_id]["iterations"] += 1
 
-            # 延迟一小段时间，避免API调用过快
-            time.sleep(1)
+        # 已有答案的任务直接复用，其余任务并发执行
+        pending_tasks = []
+        for task in sub_tasks:
+            task_id = task.get("id")
+            if task_id in all_sub_answers:
+                logging.info(f"子任务 '{task.get('title', '未命名任务')}' 已有答案，跳过执行")
+                iteration_sub_answers[task_id] = all_sub_answers[task_id]
+            else:
+                pending_tasks.append(task)
+
+        if pending_tasks:
+            if iteration == max_iterations - 1:
+                # 阶梯式流水：最后一轮不等全部子任务完成，子答案达到
+                # 法定比例后即提前启动答案大纲生成，与尾部子任务的执行重叠
+                quorum_ratio = config.get("runtime_parameters").get("answer_plan_quorum", 0.7)
+                total_expected = len(iteration_sub_answers) + len(pending_tasks)
+                quorum = max(1, int(total_expected * quorum_ratio))
+
+                task_futures = [asyncio.create_task(execute_sub_task(task)) for task in pending_tasks]
+                for finished in asyncio.as_completed(task_futures):
+                    await finished
+                    completed = len(all_sub_answers | iteration_sub_answers)
+                    if early_outline_task is None and completed >= quorum:
+                        partial_answers = dict(all_sub_answers)
+                        partial_answers.update(iteration_sub_answers)
+                        early_outline_task = asyncio.create_task(answer_plan_agent.execute({
+                            "query": query,
+                            "sub_answers": partial_answers
+                        }))
+                        logging.info(f"子答案达到法定比例({completed}/{total_expected})，提前启动答案大纲生成")
+            else:
+                await asyncio.gather(*(execute_sub_task(task) for task in pending_tasks))
 
         # 更新所有子答案集合
         all_sub_answers.update(iteration_sub_answers)
@@ -197,20 +249,23 @@ def main_workflow(query: str, max_iterations: int = 2) -> Dict[str, Any]:
             "unexecuted_plan": task_plan
         }
 
-        insights = insight_agent.execute(insight_context)
+        insights = await insight_agent.execute(insight_context)
 
         logging.info("已生成洞察，准备下一轮规划迭代")
 
         # 延迟一小段时间
-        time.sleep(1)
+        await asyncio.sleep(1)
 
-    # 5. 生成答案大纲
-    answer_plan_context = {
-        "query": query,
-        "sub_answers": all_sub_answers
-    }
+    # 5. 生成答案大纲（若已提前启动，直接取其结果）
+    if early_outline_task is not None:
+        answer_plan = await early_outline_task
+    else:
+        answer_plan_context = {
+            "query": query,
+            "sub_answers": all_sub_answers
+        }
 
-    answer_plan = answer_plan_agent.execute(answer_plan_context)
+        answer_plan = await answer_plan_agent.execute(answer_plan_context)
 
     # 6. 生成最终答案
     answer_context = {
@@ -219,7 +274,7 @@ def main_workflow(query: str, max_iterations: int = 2) -> Dict[str, Any]:
         "outline": answer_plan.get("outline", "")
     }
 
-    final_answer = answer_agent.execute(answer_context)
+    final_answer = await answer_agent.execute(answer_context)
 
     # 计算总耗时
     total_time = time.time() - start_time
@@ -2,6 +2,7 @@
 答案生成代理模块的测试。
 """
 
+import asyncio
 import unittest
 from aisr.core.llm_provider import LLMProvider
 from aisr.agents.answer import AnswerAgent
@@ -69,7 +70,7 @@ class TestAnswerAgent(unittest.TestCase):
         print(f"子答案数: {len(sub_answers)}")
         print(f"大纲长度: {len(outline)} 字符")
 
-        result = self.agent.execute(context)
+        result = asyncio.run(self.agent.execute(context))
 
         print(f"最终答案预览 (前300个字符):")
         answer = result.get("answer", "无答案")
@@ -2,6 +2,7 @@
 答案规划代理模块的测试。
 """
 
+import asyncio
 import unittest
 from aisr.core.llm_provider import LLMProvider
 from aisr.agents.answer_plan import AnswerPlanAgent
@@ -36,7 +37,7 @@ class TestAnswerPlanAgent(unittest.TestCase):
         print(f"查询: {TEST_QUERY}")
         print(f"子答案数: {len(sub_answers)}")
 
-        result = self.agent.execute(context)
+        result = asyncio.run(self.agent.execute(context))
 
         print(f"生成的答案大纲:")
         print(result.get("outline", "无大纲"))
@@ -2,6 +2,7 @@
 洞察生成代理模块的测试。
 """
 
+import asyncio
 import unittest
 from aisr.core.llm_provider import LLMProvider
 from aisr.agents.insight import InsightAgent
@@ -54,7 +55,7 @@ class TestInsightAgent(unittest.TestCase):
         print(f"已完成任务数: {len(sub_answers)}")
         print(f"未执行任务数: {len(unexecuted_plan.get('sub_tasks',[]))}")
 
-        result = self.agent.execute(context)
+        result = asyncio.run(self.agent.execute(context))
 
         print(f"生成的洞察:")
         print(result.get("insight", "无洞察"))
@@ -2,6 +2,7 @@
 搜索规划代理模块的测试。
 """
 
+import asyncio
 import unittest
 from aisr.core.llm_provider import LLMProvider
 from aisr.agents.search_plan import SearchPlanAgent
@@ -25,7 +26,7 @@ class TestSearchPlanAgent(unittest.TestCase):
         print(f"任务: {TEST_TASK['title']}")
         print(f"描述: {TEST_TASK['description']}")
 
-        result = self.agent.execute(context)
+        result = asyncio.run(self.agent.execute(context))
 
         print(f"生成的搜索查询:")
         for i, query in enumerate(result.get("queries", [])):
@@ -75,7 +76,7 @@ class TestSearchPlanAgent(unittest.TestCase):
         print(f"相关任务数量: {len(related_tasks_answers)}")
 
         # 执行代理
-        result = self.agent.execute(context)
+        result = asyncio.run(self.agent.execute(context))
 
         print(f"生成的新搜索查询:")
         for i, query in enumerate(result.get("queries", [])):
@@ -133,7 +134,7 @@ class TestSearchPlanAgent(unittest.TestCase):
             print(f"第 {i + 1} 轮查询: {plan['queries']}")
         print(f"最新子答案: {previous_sub_answer}")
 
-        result = self.agent.execute(context)
+        result = asyncio.run(self.agent.execute(context))
 
         print(f"生成的新搜索查询:")
         for i, query in enumerate(result.get("queries", [])):
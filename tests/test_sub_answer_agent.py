@@ -2,6 +2,7 @@
 子答案生成代理模块的测试。
 """
 
+import asyncio
 import unittest
 from aisr.core.llm_provider import LLMProvider
 from aisr.agents.sub_answer import SubAnswerAgent
@@ -28,7 +29,7 @@ class TestSubAnswerAgent(unittest.TestCase):
         print(f"任务: {TEST_TASK['title']}")
         print(f"搜索结果数: {TEST_SEARCH_RESULTS['result_count']}")
 
-        result = self.agent.execute(context)
+        result = asyncio.run(self.agent.execute(context))
 
         print(f"生成的子答案:")
         print(result.get("answer", "无答案"))
@@ -59,7 +60,7 @@ class TestSubAnswerAgent(unittest.TestCase):
                 "search_results": search_results
             }
 
-            result = self.agent.execute(context)
+            result = asyncio.run(self.agent.execute(context))
 
             print(f"生成的子答案:")
             print(result.get("answer", "无答案"))
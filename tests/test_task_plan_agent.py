@@ -2,6 +2,7 @@
 任务规划代理模块的测试。
 """
 import os
+import asyncio
 import unittest
 import json
 from aisr.core.llm_provider import LLMProvider
@@ -28,7 +29,7 @@ class TestTaskPlanAgent(unittest.TestCase):
         print("\n=== 测试任务规划 ===")
         print(f"查询: {TEST_QUERY}")
 
-        result = self.agent.execute(context)
+        result = asyncio.run(self.agent.execute(context))
 
         print(f"子任务数: {len(result.get('sub_tasks', []))}")
         print("生成的子任务:")
@@ -64,7 +65,7 @@ class TestTaskPlanAgent(unittest.TestCase):
         print(f"查询: {TEST_QUERY}")
         print(f"已有子答案数: {len(previous_sub_answers)}")
 
-        result = self.agent.execute(context)
+        result = asyncio.run(self.agent.execute(context))
 
         print(f"子任务数: {len(result.get('sub_tasks', []))}")
         print("生成的子任务:")